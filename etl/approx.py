@@ -0,0 +1,354 @@
+import pickle
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from query import DIMENSIONS, MEASURES, MEASURE_DECIMALS, DEFAULT_MEASURES
+
+APPROX_STATE_FILE = Path("approx_state.pkl")
+
+# z-value used for the reported error bounds (95% confidence)
+Z_95 = 1.96
+
+# Fact columns kept in the sample
+SAMPLE_COLUMNS = ["technology_key", "country_key", "seniority_key", "experience_key", "year",
+                  "code_challenge_score", "technical_interview_score", "hired_flag", "yoe"]
+
+# Sampled rows are weighted per (technology, year) stratum. Kept coarse on
+# purpose: with ~50 technologies and a handful of years every stratum still
+# holds dozens of sampled rows, while technology x country x year would leave
+# most strata with one row or none.
+STRATA_COLUMNS = ["technology_key", "year"]
+
+# Rows kept in the sample in total, however large the fact table grows
+SAMPLE_CAPACITY = 20000
+
+# Sample column behind each dimension of the KPI builder (the sample keeps the year itself)
+SAMPLE_KEYS = {"technology": "technology_key", "country": "country_key",
+               "seniority": "seniority_key", "year": "year", "experience": "experience_key"}
+
+# Measure -> (numerator, denominator, scale); no denominator means an estimated total
+ESTIMATORS = {
+    "total_applications": ("one", None, 1),
+    "total_hires": ("hired_flag", None, 1),
+    "total_rejected": ("rejected", None, 1),
+    "hire_rate_percentage": ("hired_flag", "one", 100),
+    "avg_code_score": ("code_challenge_score", "has_code_challenge_score", 1),
+    "avg_interview_score": ("technical_interview_score", "has_technical_interview_score", 1),
+    "avg_years_of_experience": ("yoe", "has_yoe", 1),
+}
+
+
+class HyperLogLog:
+    """HyperLogLog sketch for distinct counts (2**p registers, ~1.04/sqrt(2**p) relative error)"""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, values):
+        values = pd.Series(values).dropna().astype(str)
+        if values.empty:
+            return
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes << np.uint64(self.p)
+        rank = np.minimum(_leading_zeros(rest), 64 - self.p) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        self.registers = np.maximum(self.registers, other.registers)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / np.sqrt(self.m)
+
+    def count(self) -> float:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(2.0 ** -self.registers.astype(float))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * np.log(self.m / zeros)  # linear counting for small sets
+        return float(estimate)
+
+
+def _leading_zeros(values: np.ndarray) -> np.ndarray:
+    """Count leading zero bits of uint64 values"""
+    x = values.copy()
+    zeros = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = (x >> np.uint64(64 - shift)) == 0
+        zeros[empty] += shift
+        x[empty] <<= np.uint64(shift)
+    zeros[values == 0] = 64
+    return zeros
+
+
+class StratifiedReservoir:
+    """
+    Bounded stratified sample of fact rows (strata: STRATA_COLUMNS).
+
+    Every row gets a uniform random key and the sample keeps the `capacity`
+    rows with the smallest keys overall plus, for every stratum, its
+    `min_per_stratum` smallest keys. Within a stratum the kept rows are
+    therefore always the ones with its n smallest keys, a uniform sample of
+    that stratum, and each of them stands for N/n rows (N is counted
+    exactly). Strata are sampled in proportion to their size, small strata
+    are never left empty, and the sample holds at most
+    capacity + min_per_stratum * strata rows however large the table grows.
+    """
+
+    def __init__(self, capacity: int = SAMPLE_CAPACITY, min_per_stratum: int = 20, seed: int = 42):
+        self.capacity = capacity
+        self.min_per_stratum = min_per_stratum
+        self.rng = np.random.default_rng(seed)
+        self.sample = pd.DataFrame(columns=SAMPLE_COLUMNS + ["_key"], dtype=float)
+        self.population = pd.Series(dtype=float)  # stratum -> rows seen
+        self.seen = 0
+
+    def add(self, rows: pd.DataFrame):
+        rows = rows[SAMPLE_COLUMNS].astype(float).reset_index(drop=True)
+        if rows.empty:
+            return
+        counts = rows[STRATA_COLUMNS].fillna(-1).value_counts().astype(float)
+        self.population = counts if self.population.empty else self.population.add(counts, fill_value=0)
+        self.seen += len(rows)
+
+        rows["_key"] = self.rng.random(len(rows))
+        combined = pd.concat([self.sample, rows], ignore_index=True) if len(self.sample) else rows
+        combined = combined.sort_values("_key", kind="stable", ignore_index=True)
+        # Sorted by key, so the first `capacity` rows are the global smallest keys
+        rank = combined.groupby([combined[c].fillna(-1) for c in STRATA_COLUMNS], sort=False).cumcount()
+        keep = (combined.index < self.capacity) | (rank.to_numpy() < self.min_per_stratum)
+        self.sample = combined[keep].reset_index(drop=True)
+
+    def frame(self) -> pd.DataFrame:
+        """All sampled rows with their stratum id, population (N) and sample size (n)"""
+        frame = self.sample.drop(columns="_key")
+        strata = pd.MultiIndex.from_frame(frame[STRATA_COLUMNS].fillna(-1))
+        stratum, _ = pd.factorize(strata)
+        frame["stratum"] = stratum
+        frame["N"] = self.population.reindex(strata).to_numpy() if len(frame) else []
+        frame["n"] = np.bincount(stratum)[stratum] if len(frame) else []
+        return frame
+
+
+def _stratified_estimate(frame, groups, y, x=None):
+    """
+    Stratified estimate of sum(y) per group, or of the ratio sum(y) / sum(x)
+    when x is given, together with its standard error.
+    """
+    d = pd.DataFrame({"stratum": frame["stratum"], "N": frame["N"], "n": frame["n"],
+                      "y": y, "x": 0.0 if x is None else x})
+    for col in groups:
+        d[col] = frame[col]
+    d["yy"], d["xx"], d["xy"] = d["y"] ** 2, d["x"] ** 2, d["x"] * d["y"]
+
+    agg = d.groupby(groups + ["stratum", "N", "n"])[["y", "x", "yy", "xx", "xy"]].sum().reset_index()
+    weight = agg["N"] / agg["n"]
+    agg["ty"], agg["tx"] = weight * agg["y"], weight * agg["x"]
+    totals = agg.groupby(groups)[["ty", "tx"]].sum()
+
+    if x is None:
+        estimate = totals["ty"]
+        z, zz = agg["y"], agg["yy"]
+    else:
+        estimate = totals["ty"] / totals["tx"].replace(0, np.nan)
+        ratio = agg[groups].merge(estimate.rename("r").reset_index(), on=groups, how="left")["r"].fillna(0).to_numpy()
+        z = agg["y"] - ratio * agg["x"]
+        zz = agg["yy"] - 2 * ratio * agg["xy"] + ratio ** 2 * agg["xx"]
+
+    n, N = agg["n"], agg["N"]
+    s2 = ((zz - z ** 2 / n) / (n - 1).where(n > 1)).fillna(0).clip(lower=0)
+    agg["var"] = N ** 2 * (1 - n / N) * s2 / n
+    variance = agg.groupby(groups)["var"].sum()
+    if x is not None:
+        variance = variance / totals["tx"].replace(0, np.nan) ** 2
+    return estimate, np.sqrt(variance)
+
+
+class ApproxStore:
+    """
+    Sketches maintained at load time for the approximate KPI mode: HyperLogLog
+    sketches for the distinct counts of the summary, a bounded reservoir
+    sample of Fact_Application stratified by technology/year, and the
+    dimension labels needed to answer KPIs without touching MySQL.
+    """
+
+    def __init__(self, capacity: int = SAMPLE_CAPACITY, p: int = 12):
+        self.reservoir = StratifiedReservoir(capacity)
+        self.sketches = {name: HyperLogLog(p) for name in
+                         ["unique_candidates", "total_technologies", "total_countries",
+                          "total_seniority_levels"]}
+        self.labels = {name: {} for name in DIMENSIONS}  # dimension -> {key: label}
+        self.date_years = {}
+        self.experience_bounds = {}  # experience_key -> (min_years, max_years)
+        self.min_year = None
+        self.max_year = None
+        self._prepared = None  # sample frame with the estimator columns, built once per state
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_prepared"] = None
+        return state
+
+    def update(self, dataframes: dict):
+        """Fold a loaded batch (dimension rows + facts, warehouse keys) into the sketches"""
+        for name, (table, _, key_col, label_col) in DIMENSIONS.items():
+            dim = dataframes.get(table)
+            if dim is not None and not dim.empty and name != "year":
+                self.labels[name].update(zip(dim[key_col], dim[label_col]))
+        dates = dataframes.get("Dim_Date")
+        if dates is not None and not dates.empty:
+            self.date_years.update(zip(dates["date_key"], dates["year"]))
+        experience = dataframes.get("Dim_ExperienceRange")
+        if experience is not None and not experience.empty:
+            self.experience_bounds.update(zip(experience["experience_key"],
+                                              zip(experience["min_years"], experience["max_years"])))
+
+        fact = dataframes["Fact_Application"].copy()
+        fact["year"] = fact["date_key"].map(self.date_years)
+        joined = fact.dropna(subset=["technology_key", "country_key", "seniority_key", "year"])
+        self.sketches["unique_candidates"].add(joined["candidate_key"])
+        self.sketches["total_technologies"].add(joined["technology_key"].map(self.labels["technology"]))
+        self.sketches["total_countries"].add(joined["country_key"].map(self.labels["country"]))
+        self.sketches["total_seniority_levels"].add(joined["seniority_key"].map(self.labels["seniority"]))
+        if not joined.empty:
+            low, high = int(joined["year"].min()), int(joined["year"].max())
+            self.min_year = low if self.min_year is None else min(self.min_year, low)
+            self.max_year = high if self.max_year is None else max(self.max_year, high)
+
+        self.reservoir.add(fact[SAMPLE_COLUMNS])
+        self._prepared = None
+
+    def save(self, path=APPROX_STATE_FILE):
+        Path(path).write_bytes(pickle.dumps(self))
+        print(f"✅ Approximate KPI state saved to {path}")
+
+    def _sample_frame(self, dimensions, filters, required=()):
+        """Sample with derived columns, and a 0/1 mask of rows inside the slice"""
+        if self._prepared is None:
+            frame = self.reservoir.frame()
+            frame["one"] = 1.0
+            frame["rejected"] = 1.0 - frame["hired_flag"]
+            for col in ["code_challenge_score", "technical_interview_score", "yoe"]:
+                frame[f"has_{col}"] = frame[col].notna().astype(float)
+                frame[col] = frame[col].fillna(0)
+            frame["_all"] = 0
+            self._prepared = frame
+        frame = self._prepared
+
+        mask = pd.Series(True, index=frame.index)
+        for name in list(dimensions) + list(required):
+            mask &= frame[SAMPLE_KEYS[name]].notna()
+        for name, values in filters.items():
+            wanted = {str(v) for v in values}
+            if name == "year":
+                mask &= frame["year"].astype("Int64").astype(str).isin(wanted)
+            else:
+                keys = [k for k, label in self.labels[name].items() if str(label) in wanted]
+                mask &= frame[SAMPLE_KEYS[name]].isin(keys)
+        return frame, mask.astype(float)
+
+    def kpi(self, dimensions=(), measures=None, filters=None, scored_only=False, required=()):
+        """
+        Approximate counterpart of query.build_kpi. Every measure comes with a
+        `<measure>_error` column: the half-width of its 95% confidence interval.
+        `required` lists dimensions a row must have a key for, like an inner join.
+        """
+        dimensions = list(dimensions)
+        measures = list(measures or DEFAULT_MEASURES)
+        for name in list(dimensions) + list(filters or {}):
+            if name not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{name}'. Available: {', '.join(DIMENSIONS)}")
+        for name in measures:
+            if name not in MEASURES:
+                raise ValueError(f"Unknown measure '{name}'. Available: {', '.join(MEASURES)}")
+
+        frame, mask = self._sample_frame(dimensions, filters or {}, required)
+        if scored_only:
+            mask *= frame["has_code_challenge_score"] * frame["has_technical_interview_score"]
+        group_cols = [SAMPLE_KEYS[d] for d in dimensions] or ["_all"]
+        frame = frame[mask > 0]
+        if frame.empty:
+            return pd.DataFrame(columns=[DIMENSIONS[d][3] for d in dimensions] +
+                                [c for m in measures for c in (m, f"{m}_error")])
+
+        result = pd.DataFrame()
+        for m in measures:
+            numerator, denominator, scale = ESTIMATORS[m]
+            estimate, se = _stratified_estimate(frame, group_cols, frame[numerator],
+                                                None if denominator is None else frame[denominator])
+            decimals = MEASURE_DECIMALS.get(m, 0)
+            result[m] = (estimate * scale).round(decimals)
+            if not decimals:
+                result[m] = result[m].astype("Int64")
+            result[f"{m}_error"] = (Z_95 * se * scale).round(decimals if decimals else 1)
+        result = result.reset_index()
+
+        for name in dimensions:
+            key_col, label_col = SAMPLE_KEYS[name], DIMENSIONS[name][3]
+            if name == "year":
+                result[label_col] = result[key_col].astype(int)
+            else:
+                result[label_col] = result[key_col].map(self.labels[name])
+                if name == "experience":
+                    result["min_years"] = result[key_col].map(lambda k: self.experience_bounds.get(k, (None, None))[0])
+                    result["max_years"] = result[key_col].map(lambda k: self.experience_bounds.get(k, (None, None))[1])
+        label_cols = [DIMENSIONS[d][3] for d in dimensions]
+        extra = ["min_years", "max_years"] if "experience" in dimensions else []
+        result = result[label_cols + extra + [c for m in measures for c in (m, f"{m}_error")]]
+        return result.sort_values(label_cols).reset_index(drop=True) if label_cols else result
+
+    def summary(self) -> pd.DataFrame:
+        """Approximate counterpart of query.get_summary_stats"""
+        # Same inner joins as the SQL summary
+        summary = self.kpi([], ["total_applications", "total_hires", "hire_rate_percentage",
+                                "avg_code_score", "avg_interview_score"],
+                           required=["technology", "country", "seniority", "year"])
+        if summary.empty:
+            return summary
+        summary = summary.rename(columns={"hire_rate_percentage": "overall_hire_rate",
+                                          "hire_rate_percentage_error": "overall_hire_rate_error"})
+        for name, sketch in self.sketches.items():
+            estimate = sketch.count()
+            summary[name] = round(estimate)
+            summary[f"{name}_error"] = round(Z_95 * sketch.relative_error * estimate, 1)
+        summary["earliest_year"] = self.min_year
+        summary["latest_year"] = self.max_year
+        return summary
+
+
+def build_store(dataframes: dict, path=APPROX_STATE_FILE) -> ApproxStore:
+    """Build the approximate KPI state from a full load and save it"""
+    store = ApproxStore()
+    store.update(dataframes)
+    store.save(path)
+    return store
+
+
+_loaded_stores = {}  # path -> (mtime, ApproxStore)
+
+def load_store(path=APPROX_STATE_FILE):
+    """Load the saved approximate KPI state (cached until the file changes), or None"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    mtime = path.stat().st_mtime
+    cached = _loaded_stores.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, pickle.loads(path.read_bytes()))
+        _loaded_stores[path] = cached
+    return cached[1]
+
+
+def update_saved_store(dataframes: dict, path=APPROX_STATE_FILE):
+    """Fold an appended batch into the saved state (only if a full load created one)"""
+    store = load_store(path)
+    if store is None:
+        return None
+    store.update(dataframes)
+    store.save(path)
+    # The next batch can reuse this copy instead of reading the file back
+    _loaded_stores[Path(path)] = (Path(path).stat().st_mtime, store)
+    return store
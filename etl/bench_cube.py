@@ -0,0 +1,92 @@
+import argparse
+import random
+import time
+from etl import extract, transform
+from cube import StarCube
+from query import (
+    kpi_hires_by_technology,
+    kpi_hires_by_year,
+    kpi_hires_by_seniority,
+    kpi_hires_by_country_over_years,
+    kpi_hire_rate_by_technology,
+    kpi_scores_by_experience,
+    get_summary_stats,
+    build_kpi,
+    DIMENSIONS,
+    MEASURES
+)
+
+
+def timed(fn, repeat):
+    """Median wall time of fn() in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return sorted(times)[len(times) // 2]
+
+
+def random_slices(cube, count, seed=7):
+    """Random (dimensions, measures, filters) combinations over the cube's labels"""
+    rng = random.Random(seed)
+    slices = []
+    for _ in range(count):
+        dimensions = rng.sample(list(DIMENSIONS), rng.randint(0, 2))
+        measures = rng.sample(list(MEASURES), rng.randint(1, 3))
+        filters = {}
+        for name in rng.sample(list(DIMENSIONS), rng.randint(1, 3)):
+            labels = [str(v) for v in cube.labels[name]]
+            filters[name] = rng.sample(labels, min(len(labels), rng.randint(1, 3)))
+        slices.append((dimensions, measures, filters))
+    return slices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory cube against the SQL KPI path")
+    parser.add_argument("--input", help="Build the cube from this CSV instead of reading the warehouse")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median is reported)")
+    parser.add_argument("--slices", type=int, default=20, help="Random slices to compare")
+    parser.add_argument("--no-sql", action="store_true", help="Only time the cube (no MySQL needed)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.input:
+        cube = StarCube.from_transformed(transform(extract(args.input)))
+    else:
+        cube = StarCube.from_warehouse()
+    print(f"✅ Cube built with {cube.size} facts in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # (name, SQL path, cube DataFrame path, cube arrays path or None)
+    cases = [
+        ("hires_by_technology", kpi_hires_by_technology, cube.hires_by_technology, None),
+        ("hires_by_year", kpi_hires_by_year, cube.hires_by_year, None),
+        ("hires_by_seniority", kpi_hires_by_seniority, cube.hires_by_seniority, None),
+        ("hires_by_country_years", kpi_hires_by_country_over_years, cube.hires_by_country_over_years, None),
+        ("hire_rate_by_technology", kpi_hire_rate_by_technology, cube.hire_rate_by_technology, None),
+        ("scores_by_experience", kpi_scores_by_experience, cube.scores_by_experience, None),
+        ("summary", get_summary_stats, cube.summary, None),
+    ]
+    for i, (dimensions, measures, filters) in enumerate(random_slices(cube, args.slices)):
+        cases.append((
+            f"slice_{i}",
+            lambda d=dimensions, m=measures, f=filters: build_kpi(d, m, f),
+            lambda d=dimensions, m=measures, f=filters: cube.kpi(d, m, f),
+            lambda d=dimensions, m=measures, f=filters: cube.kpi_arrays(d, m, f),
+        ))
+
+    print("\n" + "=" * 73)
+    print(f"{'kpi':<26} {'sql ms':>10} {'cube ms':>10} {'arrays ms':>10} {'speedup':>12}")
+    for name, sql_fn, cube_fn, arrays_fn in cases:
+        cube_ms = timed(cube_fn, args.repeat)
+        arrays = f"{timed(arrays_fn, args.repeat):>10.3f}" if arrays_fn else f"{'-':>10}"
+        if args.no_sql:
+            print(f"{name:<26} {'-':>10} {cube_ms:>10.3f} {arrays} {'-':>12}")
+            continue
+        sql_ms = timed(sql_fn, args.repeat)
+        print(f"{name:<26} {sql_ms:>10.2f} {cube_ms:>10.3f} {arrays} {sql_ms / cube_ms:>11.1f}x")
+    print("=" * 73)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+from etl import extract, transform
+from db import create_tables
+from main import INPUT_CSV, CHUNK_SIZE, create_database_if_not_exists, load_data_to_database
+
+
+def benchmark(input_csv: str, worker_counts, chunk_size: int = CHUNK_SIZE, repeat: int = 1) -> list:
+    """Reload the warehouse from scratch once per worker count and measure throughput"""
+    transformed = transform(extract(input_csv))
+    create_database_if_not_exists()
+
+    results = []
+    for workers in worker_counts:
+        for run in range(1, repeat + 1):
+            print(f"\n🔹 Loading with {workers} worker(s), run {run}/{repeat}...")
+            create_tables()
+            stats = load_data_to_database(transformed, chunk_size=chunk_size, workers=workers)
+            results.append({"workers": workers, "run": run, **stats})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure load throughput as workers scale (local MySQL)")
+    parser.add_argument("--input", default=INPUT_CSV, help="Candidates CSV file")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma separated worker counts")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per committed chunk")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per worker count")
+    args = parser.parse_args()
+
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    results = benchmark(args.input, worker_counts, args.chunk_size, args.repeat)
+
+    baseline = results[0]["records_per_second"] or 1
+    print("\n" + "=" * 60)
+    print(f"{'workers':>8} {'run':>4} {'records':>10} {'seconds':>9} {'records/s':>11} {'speedup':>8}")
+    for r in results:
+        print(f"{r['workers']:>8} {r['run']:>4} {r['records']:>10} {r['seconds']:>9} "
+              f"{r['records_per_second']:>11} {r['records_per_second'] / baseline:>7.2f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
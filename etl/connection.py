@@ -1,4 +1,5 @@
 import mysql.connector
+from mysql.connector import pooling
 
 DB_CONFIG = {
     "host": "localhost",
@@ -8,4 +9,8 @@ DB_CONFIG = {
 }
 
 def get_connection():
-    return mysql.connector.connect(**DB_CONFIG)
\ No newline at end of file
+    return mysql.connector.connect(**DB_CONFIG)
+
+def get_connection_pool(size):
+    """Pool of `size` connections (mysql-connector allows at most 32)"""
+    return pooling.MySQLConnectionPool(pool_name="etl_load", pool_size=size, **DB_CONFIG)
@@ -0,0 +1,276 @@
+import numpy as np
+import pandas as pd
+from query import DIMENSIONS, MEASURES, MEASURE_DECIMALS, DEFAULT_MEASURES, FOCUS_COUNTRIES, execute_query
+
+
+def _code_dtype(cardinality: int):
+    """Smallest signed integer type that holds codes 0..cardinality-1 and -1 for missing"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if cardinality < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class StarCube:
+    """
+    In-process copy of the star schema for interactive slicing.
+
+    The fact table is held as contiguous NumPy arrays: one small-integer code
+    array per dimension (-1 where the fact has no matching dimension row, like
+    a failed inner join) and one array per measure. Every dimension also has a
+    sorted-position index (row positions grouped by code), so a filter gathers
+    just the matching rows instead of scanning the whole fact table, and all
+    aggregations are vectorized bincounts over the selected rows.
+    """
+
+    def __init__(self, dataframes: dict):
+        fact = dataframes["Fact_Application"]
+        self.size = len(fact)
+        self.codes = {}    # dimension -> code per fact row
+        self.labels = {}   # dimension -> label per code
+        self.extra = {}    # dimension -> extra columns per code (experience bounds)
+        self.index = {}    # dimension -> (row positions sorted by code, offsets per code)
+
+        for name, (table, _, key_col, label_col) in DIMENSIONS.items():
+            dim = dataframes[table]
+            # Fact_Application references every dimension by the dimension's own key column
+            fact_keys = pd.to_numeric(fact[key_col], errors="coerce").astype(np.float64)
+            if name == "year":
+                # Dim_Date has one row per date; the cube groups by its year
+                key_to_label = pd.Series(dim[label_col].to_numpy(), index=pd.to_numeric(dim[key_col]).to_numpy(dtype=np.float64))
+                fact_labels = fact_keys.map(key_to_label)
+                labels = np.sort(fact_labels.dropna().unique()).astype(int)
+                codes = pd.Series(pd.Categorical(fact_labels, categories=labels).codes)
+            else:
+                dim = dim.sort_values(label_col if name != "experience" else "min_years")
+                labels = dim[label_col].to_numpy()
+                categories = pd.to_numeric(dim[key_col]).to_numpy(dtype=np.float64)
+                codes = pd.Series(pd.Categorical(fact_keys, categories=categories).codes)
+                if name == "experience":
+                    self.extra[name] = dim[["min_years", "max_years"]].reset_index(drop=True)
+            self.labels[name] = labels
+            self.codes[name] = codes.to_numpy(dtype=_code_dtype(len(labels)))
+
+            order = np.argsort(self.codes[name], kind="stable")
+            offsets = np.searchsorted(self.codes[name][order], np.arange(-1, len(labels) + 1))
+            self.index[name] = (order, offsets)
+
+        self.code_score = pd.to_numeric(fact["code_challenge_score"], errors="coerce").to_numpy(dtype=np.float64)
+        self.interview_score = pd.to_numeric(fact["technical_interview_score"], errors="coerce").to_numpy(dtype=np.float64)
+        self.yoe = pd.to_numeric(fact["yoe"], errors="coerce").to_numpy(dtype=np.float64)
+        self.hired = pd.to_numeric(fact["hired_flag"], errors="coerce").fillna(0).to_numpy(dtype=np.int8)
+        self.scored = ~np.isnan(self.code_score) & ~np.isnan(self.interview_score)
+        self.candidate = pd.to_numeric(fact["candidate_key"], errors="coerce").to_numpy(dtype=np.float64)
+
+    @classmethod
+    def from_transformed(cls, dataframes: dict):
+        """Build the cube straight from transform() output"""
+        return cls(dataframes)
+
+    @classmethod
+    def from_warehouse(cls):
+        """Build the cube from the MySQL warehouse (one full read per table)"""
+        dataframes = {}
+        for table in ["Dim_Date", "Dim_Country", "Dim_Seniority", "Dim_Technology",
+                      "Dim_ExperienceRange", "Fact_Application"]:
+            df = execute_query(f"SELECT * FROM {table}", f"Cube load {table}")
+            if df is None:
+                raise RuntimeError(f"Could not load {table} for the cube")
+            dataframes[table] = df
+        return cls(dataframes)
+
+    # ==============================
+    # SELECTION
+    # ==============================
+    def _positions(self, name, code_list):
+        order, offsets = self.index[name]
+        # offsets[0] is where code -1 starts, so code c starts at offsets[c + 1]
+        parts = [order[offsets[c + 1]:offsets[c + 2]] for c in code_list]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def _codes_for(self, name, values):
+        wanted = {str(v) for v in values}
+        return [c for c, label in enumerate(self.labels[name]) if str(label) in wanted]
+
+    def select(self, filters=None, required=(), scored_only=False, yoe_between=None):
+        """Row positions matching every filter ({dimension: [labels]})"""
+        filters = filters or {}
+        for name in filters:
+            if name not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{name}'. Available: {', '.join(DIMENSIONS)}")
+
+        # Gather rows through the index of the most selective filter, then check the rest on codes
+        allowed = {name: self._codes_for(name, values) for name, values in filters.items()}
+        if allowed:
+            first = min(allowed, key=lambda n: sum(self._count(n, c) for c in allowed[n]))
+            rows = self._positions(first, allowed[first])
+            at, keep = rows, np.ones(len(rows), dtype=bool)
+        else:
+            # No filter: test the whole columns (views) and gather the positions once at the end
+            first, rows = None, None
+            at, keep = slice(None), np.ones(self.size, dtype=bool)
+
+        for name, code_list in allowed.items():
+            if name != first:
+                lookup = np.zeros(len(self.labels[name]) + 1, dtype=bool)
+                lookup[np.array(code_list, dtype=np.int64)] = True
+                keep &= lookup[self.codes[name][at]]
+        for name in required:
+            keep &= self.codes[name][at] >= 0
+        if scored_only:
+            keep &= self.scored[at]
+        if yoe_between is not None:
+            low, high = yoe_between
+            values = self.yoe[at]
+            keep &= ~np.isnan(values)
+            with np.errstate(invalid="ignore"):
+                if low is not None:
+                    keep &= values >= low
+                if high is not None:
+                    keep &= values < high
+        return np.flatnonzero(keep) if rows is None else rows[keep]
+
+    def _count(self, name, code):
+        _, offsets = self.index[name]
+        return offsets[code + 2] - offsets[code + 1]
+
+    # ==============================
+    # AGGREGATION
+    # ==============================
+    def kpi_arrays(self, dimensions=(), measures=None, filters=None, scored_only=False,
+                   yoe_between=None, min_applications=None) -> dict:
+        """
+        Same dimensions, measures and filters as query.build_kpi, answered from
+        the arrays as {column: ndarray}, one entry per group. This is the hot
+        path for interactive slicing: building a DataFrame from the result
+        (kpi) usually costs more than the aggregation itself.
+        `yoe_between=(low, high)` filters on years of experience and
+        `min_applications` mirrors a HAVING COUNT(...) >= n clause.
+        """
+        dimensions = list(dimensions)
+        measures = list(measures or DEFAULT_MEASURES)
+        for name in dimensions:
+            if name not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{name}'. Available: {', '.join(DIMENSIONS)}")
+        for name in measures:
+            if name not in MEASURES:
+                raise ValueError(f"Unknown measure '{name}'. Available: {', '.join(MEASURES)}")
+
+        rows = self.select(filters, required=dimensions, scored_only=scored_only, yoe_between=yoe_between)
+
+        # One group id per row from the dimension codes (mixed radix)
+        group = np.zeros(len(rows), dtype=np.int64)
+        cardinalities = [len(self.labels[d]) for d in dimensions]
+        for name, cardinality in zip(dimensions, cardinalities):
+            group = group * cardinality + self.codes[name][rows]
+        groups = int(np.prod(cardinalities)) if dimensions else 1
+
+        applications = np.bincount(group, minlength=groups)
+        present = np.flatnonzero(applications)
+        if min_applications is not None:
+            present = present[applications[present] >= min_applications]
+
+        result = {}
+        remaining = present.copy()
+        for name, cardinality in reversed(list(zip(dimensions, cardinalities))):
+            code = remaining % cardinality
+            remaining //= cardinality
+            result[DIMENSIONS[name][3]] = self.labels[name][code]
+            if name in self.extra:
+                for col in ["min_years", "max_years"]:
+                    result[col] = self.extra[name][col].to_numpy()[code]
+
+        def total(values):
+            return np.bincount(group, weights=values, minlength=groups)[present]
+
+        def average(values):
+            # Weighted bincounts instead of masking out NaN rows: no copies of group/values
+            valid = ~np.isnan(values)
+            sums = np.bincount(group, weights=np.where(valid, values, 0.0), minlength=groups)[present]
+            counts = np.bincount(group, weights=valid, minlength=groups)[present]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(counts > 0, sums / counts, np.nan)
+
+        count = applications[present]
+        hires = total(self.hired[rows].astype(np.float64)).astype(np.int64)
+        computed = {
+            "total_applications": lambda: count,
+            "total_hires": lambda: hires,
+            "total_rejected": lambda: count - hires,
+            "hire_rate_percentage": lambda: hires / count * 100,
+            "avg_code_score": lambda: average(self.code_score[rows]),
+            "avg_interview_score": lambda: average(self.interview_score[rows]),
+            "avg_years_of_experience": lambda: average(self.yoe[rows]),
+        }
+        for m in measures:
+            values = computed[m]()
+            result[m] = np.round(values, MEASURE_DECIMALS[m]) if m in MEASURE_DECIMALS else values
+
+        label_cols = [DIMENSIONS[d][3] for d in dimensions]
+        extra = ["min_years", "max_years"] if "experience" in dimensions else []
+        return {col: result[col] for col in label_cols + extra + measures}
+
+    def kpi(self, dimensions=(), measures=None, filters=None, **options):
+        """kpi_arrays as a DataFrame, the shape query.build_kpi returns"""
+        return pd.DataFrame(self.kpi_arrays(dimensions, measures, filters, **options))
+
+    # ==============================
+    # KPIs FROM query.py
+    # ==============================
+    def hires_by_technology(self):
+        return self.kpi(["technology"]).sort_values("total_hires", ascending=False, kind="stable").reset_index(drop=True)
+
+    def hires_by_year(self):
+        return self.kpi(["year"])
+
+    def hires_by_seniority(self):
+        return self.kpi(["seniority"]).sort_values("total_hires", ascending=False, kind="stable").reset_index(drop=True)
+
+    def hires_by_country_over_years(self, countries=FOCUS_COUNTRIES):
+        return self.kpi(["country", "year"], filters={"country": countries})
+
+    def hire_rate_by_technology(self):
+        df = self.kpi(["technology"], ["total_applications", "total_hires", "total_rejected",
+                                       "hire_rate_percentage", "avg_code_score", "avg_interview_score"],
+                      scored_only=True, min_applications=10)
+        return df.sort_values("hire_rate_percentage", ascending=False, kind="stable").reset_index(drop=True)
+
+    def scores_by_experience(self):
+        df = self.kpi(["experience"], ["total_applications", "total_hires", "hire_rate_percentage",
+                                        "avg_code_score", "avg_interview_score", "avg_years_of_experience"],
+                      scored_only=True)
+        return df.rename(columns={"avg_code_score": "avg_code_challenge_score",
+                                  "avg_interview_score": "avg_technical_interview_score"})
+
+    def summary(self):
+        """Same figures as query.get_summary_stats"""
+        rows = self.select(required=["technology", "country", "seniority", "year"])
+        if not len(rows):
+            return pd.DataFrame()
+        years = self.labels["year"][self.codes["year"][rows]]
+        candidates = self.candidate[rows]
+        hires = int(self.hired[rows].sum())
+        return pd.DataFrame([{
+            "total_applications": len(rows),
+            "total_hires": hires,
+            "overall_hire_rate": round(hires / len(rows) * 100, 2),
+            "unique_candidates": len(np.unique(candidates[~np.isnan(candidates)])),
+            "total_technologies": len(np.unique(self.codes["technology"][rows])),
+            "total_countries": len(np.unique(self.codes["country"][rows])),
+            "total_seniority_levels": len(np.unique(self.codes["seniority"][rows])),
+            "avg_code_score": round(float(np.nanmean(self.code_score[rows])), 2),
+            "avg_interview_score": round(float(np.nanmean(self.interview_score[rows])), 2),
+            "earliest_year": int(years.min()),
+            "latest_year": int(years.max()),
+        }])
+
+    def all_kpis(self) -> dict:
+        """Same keys as query.get_all_kpis"""
+        return {
+            'hires_by_technology': self.hires_by_technology(),
+            'hires_by_year': self.hires_by_year(),
+            'hires_by_seniority': self.hires_by_seniority(),
+            'hires_by_country_years': self.hires_by_country_over_years(),
+            'hire_rate_by_technology': self.hire_rate_by_technology(),
+            'scores_by_experience': self.scores_by_experience()
+        }
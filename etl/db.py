@@ -3,14 +3,24 @@ import pandas as pd
 import mysql.connector
 from connection import get_connection
 
-def create_tables():
-    """Create all tables in the database"""
+def create_tables(drop_existing: bool = True, connection=None):
+    """
+    Create all tables in the database.
+
+    With drop_existing=False, tables that already exist are kept (used by the
+    incremental ingestion mode). A connection can be passed in to create the
+    schema somewhere other than the configured MySQL database.
+    """
     try:
-        connection = get_connection()
+        own_connection = connection is None
+        if own_connection:
+            connection = get_connection()
         cursor = connection.cursor()
         
         # Drop tables if they exist (in correct order due to foreign keys)
         drop_statements = [
+            "DROP TABLE IF EXISTS Etl_Ingest_Manifest",
+            "DROP TABLE IF EXISTS Etl_Load_Checkpoint",
             "DROP TABLE IF EXISTS Fact_Application",
             "DROP TABLE IF EXISTS Dim_ExperienceRange",
             "DROP TABLE IF EXISTS Dim_Technology", 
@@ -20,8 +30,9 @@ def create_tables():
             "DROP TABLE IF EXISTS Dim_Candidate"
         ]
         
-        for statement in drop_statements:
-            cursor.execute(statement)
+        if drop_existing:
+            for statement in drop_statements:
+                cursor.execute(statement)
         
         # Create tables
         create_statements = [
@@ -88,15 +99,38 @@ def create_tables():
                 FOREIGN KEY (technology_key) REFERENCES Dim_Technology(technology_key),
                 FOREIGN KEY (experience_key) REFERENCES Dim_ExperienceRange(experience_key)
             )
+            """,
+            """
+            CREATE TABLE Etl_Ingest_Manifest (
+                file_name VARCHAR(255),
+                file_hash CHAR(64),
+                file_size BIGINT,
+                batch_id VARCHAR(36),
+                rows_loaded INT,
+                loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (file_name, file_hash)
+            )
+            """,
+            """
+            CREATE TABLE Etl_Load_Checkpoint (
+                table_name VARCHAR(100) PRIMARY KEY,
+                last_chunk INT,
+                rows_committed INT,
+                total_rows INT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
             """
         ]
         
         for statement in create_statements:
+            if not drop_existing:
+                statement = statement.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1)
             cursor.execute(statement)
         
         connection.commit()
         cursor.close()
-        connection.close()
+        if own_connection:
+            connection.close()
         
         print("✅ All tables created successfully")
         
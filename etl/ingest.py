@@ -0,0 +1,408 @@
+import argparse
+import hashlib
+import sqlite3
+import sys
+import time
+import uuid
+from pathlib import Path
+import pandas as pd
+from etl import extract, transform
+from db import create_tables
+from connection import get_connection
+from approx import APPROX_STATE_FILE, update_saved_store
+
+# Dimensions whose rows are shared across batches:
+# table -> (surrogate key column, natural key column)
+SHARED_DIMENSIONS = {
+    "Dim_Date": ("date_key", "date"),
+    "Dim_Country": ("country_key", "country_name"),
+    "Dim_Seniority": ("seniority_key", "seniority_name"),
+    "Dim_Technology": ("technology_key", "technology_name"),
+    "Dim_ExperienceRange": ("experience_key", "range_label"),
+}
+
+TABLE_ORDER = [
+    "Dim_Candidate",
+    "Dim_Date",
+    "Dim_Country",
+    "Dim_Seniority",
+    "Dim_Technology",
+    "Dim_ExperienceRange",
+    "Fact_Application"
+]
+
+
+def placeholder(connection):
+    """Parameter marker for the connection's driver ('%s' for MySQL, '?' for sqlite3)"""
+    module = sys.modules.get(type(connection).__module__.split(".")[0])
+    return "?" if getattr(module, "paramstyle", "") == "qmark" else "%s"
+
+
+def load_manifest(connection) -> dict:
+    """Return {file name: content hashes already ingested under that name}"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT file_name, file_hash FROM Etl_Ingest_Manifest")
+    loaded = {}
+    for name, digest in cursor.fetchall():
+        loaded.setdefault(name, set()).add(digest)
+    cursor.close()
+    return loaded
+
+
+def file_hash(path) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def conform_batch(transformed: dict, cursor) -> dict:
+    """
+    Re-key a transformed batch against what is already in the warehouse.
+
+    transform() numbers every dimension from 1, so before appending, shared
+    dimension values are mapped to their existing keys, new values get keys
+    after the current maximum, and candidates and facts are offset past the
+    rows already loaded. Returns only the rows that have to be inserted.
+    """
+    fact = transformed["Fact_Application"].copy()
+    rows = {}
+
+    # Every application is a new candidate
+    cursor.execute("SELECT COALESCE(MAX(candidate_key), 0) FROM Dim_Candidate")
+    candidate_offset = int(cursor.fetchone()[0])
+    candidates = transformed["Dim_Candidate"].copy()
+    candidates["candidate_key"] += candidate_offset
+    fact["candidate_key"] += candidate_offset
+    rows["Dim_Candidate"] = candidates
+
+    for table, (key_col, natural_col) in SHARED_DIMENSIONS.items():
+        dim = transformed[table]
+        cursor.execute(f"SELECT {key_col}, {natural_col} FROM {table}")
+        existing = {str(natural): int(key) for key, natural in cursor.fetchall()}
+        next_key = max(existing.values(), default=0) + 1
+
+        key_map, new_rows = {}, []
+        for record in dim.to_dict("records"):
+            natural = str(record[natural_col])
+            if natural not in existing:
+                existing[natural] = next_key
+                next_key += 1
+                new_rows.append({**record, key_col: existing[natural]})
+            key_map[record[key_col]] = existing[natural]
+
+        fact[key_col] = fact[key_col].map(key_map)
+        rows[table] = pd.DataFrame(new_rows, columns=dim.columns)
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM Fact_Application")
+    first_id = int(cursor.fetchone()[0]) + 1
+    fact.insert(0, "id", range(first_id, first_id + len(fact)))
+    rows["Fact_Application"] = fact
+    return rows
+
+
+def insert_rows(cursor, table: str, df: pd.DataFrame, marker: str = "%s") -> int:
+    """Insert a DataFrame with executemany, mapping NaN to NULL"""
+    if df.empty:
+        return 0
+    columns = list(df.columns)
+    placeholders = ", ".join([marker] * len(columns))
+    insert_query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    values = df.astype(object).where(df.notna(), None)
+    cursor.executemany(insert_query, [tuple(row) for row in values.itertuples(index=False)])
+    return len(df)
+
+
+class IngestionDaemon:
+    """
+    Watch a directory for candidate CSV drops and append them in micro-batches.
+
+    A batch is closed when it reaches max_batch_files or max_batch_bytes, or
+    when its oldest file has waited max_batch_wait seconds. Each batch runs
+    through extract/transform and is appended in a single transaction together
+    with its Etl_Ingest_Manifest rows, so a file is loaded exactly once even if
+    the daemon is killed mid-batch and restarted. The manifest is keyed on the
+    file name and a hash of its content: a later drop that reuses a name (say a
+    daily candidates.csv) is loaded again if its content is different.
+
+    `connect` returns a DB-API connection; it defaults to the MySQL warehouse
+    but a sqlite3 connection works as a local stand-in. Committed batches are
+    also folded into the approximate KPI state at `approx_state`, if it exists
+    (by default the warehouse's APPROX_STATE_FILE, and none for any other
+    `connect`), and with precompute=True the HTTP dashboard is refreshed after
+    each batch.
+
+    A file that cannot be read or transformed is moved to `failed` right away;
+    a file whose batch fails to load max_attempts times in a row is moved
+    there too, so one bad drop never blocks the files behind it.
+    """
+
+    def __init__(self, watch_dir, connect=get_connection, pattern="*.csv",
+                 max_batch_files=50, max_batch_bytes=64 * 1024 * 1024,
+                 max_batch_wait=30.0, poll_interval=2.0, approx_state=None,
+                 precompute=False, max_attempts=3):
+        if precompute and connect is not get_connection:
+            # The dashboard KPIs are read from the MySQL warehouse (query.py), not from `connect`
+            raise ValueError("precompute=True needs the default MySQL connection")
+        if connect is get_connection:
+            approx_state = approx_state or APPROX_STATE_FILE
+        elif approx_state is not None and Path(approx_state) == Path(APPROX_STATE_FILE):
+            # Another database numbers its keys on its own; folding it in would corrupt the warehouse state
+            raise ValueError(f"{APPROX_STATE_FILE} describes the MySQL warehouse, use another approx_state")
+        self.watch_dir = Path(watch_dir)
+        self.connect = connect
+        self.approx_state = approx_state
+        self.precompute = precompute
+        self.pattern = pattern
+        self.max_batch_files = max_batch_files
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_wait = max_batch_wait
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+
+        self.processed = {}  # file name -> content hashes loaded under that name
+        self.failed = set()
+        self.done = {}  # file name -> (size, mtime) when it was last loaded or given up on
+        self.pending = {}  # file name -> {"path", "size", "mtime", "first_seen", "stable", "attempts"}
+
+        self.started_at = time.time()
+        self.batches = 0
+        self.files_loaded = 0
+        self.rows_loaded = 0
+        self.busy_seconds = 0.0
+        self.last_batch = None
+
+        connection = self.connect()
+        create_tables(drop_existing=False, connection=connection)
+        self.processed = load_manifest(connection)
+        connection.close()
+
+    def poll(self, now=None):
+        """Pick up new files; a file is ready once its size stops changing between polls"""
+        now = now or time.time()
+        for path in sorted(self.watch_dir.glob(self.pattern)):
+            name = path.name
+            stat = path.stat()
+            if self.done.get(name) == (stat.st_size, stat.st_mtime):
+                continue
+            entry = self.pending.get(name)
+            if entry is None:
+                if name in self.processed:
+                    if file_hash(path) in self.processed[name]:
+                        self.done[name] = (stat.st_size, stat.st_mtime)
+                        continue
+                    print(f"🔁 {name} was loaded before with other content, loading the new version")
+                self.failed.discard(name)
+                self.pending[name] = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime,
+                                      "first_seen": now, "stable": False, "attempts": 0}
+            else:
+                entry["stable"] = entry["size"] == stat.st_size
+                entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime
+
+    def next_batch(self, now=None, force=False):
+        """Return the files of the next batch if its size or time window is full"""
+        now = now or time.time()
+        ready = sorted((e for e in self.pending.values() if e["stable"] or force),
+                       key=lambda e: (e["first_seen"], e["path"].name))
+        if not ready:
+            return []
+
+        batch, batch_bytes = [], 0
+        for entry in ready:
+            if batch and (len(batch) >= self.max_batch_files or
+                          batch_bytes + entry["size"] > self.max_batch_bytes):
+                break
+            batch.append(entry)
+            batch_bytes += entry["size"]
+
+        full = len(batch) < len(ready) or len(batch) >= self.max_batch_files or \
+            batch_bytes >= self.max_batch_bytes
+        waited = now - batch[0]["first_seen"] >= self.max_batch_wait
+        return batch if (full or waited or force) else []
+
+    def process_batch(self, batch):
+        """
+        Extract and transform every file of the batch, then append them all in
+        a single transaction. A file that cannot be read or transformed is
+        moved to `failed` so it does not hold back the rest of the batch.
+        """
+        started = time.time()
+        batch_id = str(uuid.uuid4())
+
+        transformed = []
+        for entry in list(batch):
+            try:
+                entry["hash"] = file_hash(entry["path"])
+                transformed.append(transform(extract(str(entry["path"]))))
+            except Exception as e:
+                print(f"❌ Skipping file {entry['path'].name}, it could not be processed: {e}")
+                self._give_up(entry)
+                batch.remove(entry)
+        if not batch:
+            return None
+
+        connection = self.connect()
+        marker = placeholder(connection)
+        try:
+            cursor = connection.cursor()
+            loaded = []
+            # Each file is re-keyed after the previous one was inserted (same transaction)
+            for entry, file_rows in zip(batch, transformed):
+                rows = conform_batch(file_rows, cursor)
+                for table in TABLE_ORDER:
+                    insert_rows(cursor, table, rows[table], marker)
+                cursor.execute(
+                    f"INSERT INTO Etl_Ingest_Manifest (file_name, file_hash, file_size, batch_id, rows_loaded) "
+                    f"VALUES ({marker}, {marker}, {marker}, {marker}, {marker})",
+                    (entry["path"].name, entry["hash"], entry["size"], batch_id, len(rows["Fact_Application"]))
+                )
+                loaded.append(rows)
+            connection.commit()
+            cursor.close()
+        except Exception:
+            connection.rollback()
+            self._record_failed_attempt(batch)
+            raise
+        finally:
+            connection.close()
+
+        # The files are loaded from here on: record them before anything else can fail
+        finished = time.time()
+        for entry in batch:
+            name = entry["path"].name
+            self.processed.setdefault(name, set()).add(entry["hash"])
+            self.done[name] = (entry["size"], entry["mtime"])
+            self.pending.pop(name, None)
+
+        rows = {table: pd.concat([r[table] for r in loaded if not r[table].empty] or [loaded[0][table]],
+                                 ignore_index=True)
+                for table in TABLE_ORDER}
+        fact_rows = len(rows["Fact_Application"])
+        self.batches += 1
+        self.files_loaded += len(batch)
+        self.rows_loaded += fact_rows
+        self.busy_seconds += finished - started
+        self.last_batch = {
+            "batch_id": batch_id,
+            "files": len(batch),
+            "rows": fact_rows,
+            "seconds": round(finished - started, 3),
+            "lag_seconds": round(finished - min(e["mtime"] for e in batch), 3),
+        }
+        print(f"✅ Batch {self.batches}: {len(batch)} files, {fact_rows} rows "
+              f"in {self.last_batch['seconds']}s (lag {self.last_batch['lag_seconds']}s)")
+
+        self._after_commit(rows)
+        return self.last_batch
+
+    def _after_commit(self, rows):
+        """
+        Refresh the derived state for a committed batch. The batch is loaded
+        either way, so a failure here is only reported.
+        """
+        try:
+            if self.approx_state is not None:
+                update_saved_store(rows, self.approx_state)
+        except Exception as e:
+            print(f"⚠️ Could not update the approximate KPI state: {e}")
+        if self.precompute:
+            try:
+                # Imported here so that the daemon does not load matplotlib unless it renders charts
+                from server import precompute_dashboard
+                precompute_dashboard()
+            except Exception as e:
+                print(f"⚠️ Could not refresh the dashboard: {e}")
+
+    def _record_failed_attempt(self, batch):
+        """Count a rolled back load against each file; give up on it after max_attempts"""
+        for entry in batch:
+            entry["attempts"] += 1
+            if entry["attempts"] >= self.max_attempts:
+                print(f"❌ Giving up on {entry['path'].name} after {entry['attempts']} failed loads")
+                self._give_up(entry)
+
+    def _give_up(self, entry):
+        """Stop retrying a file until a new version of it is dropped"""
+        name = entry["path"].name
+        self.failed.add(name)
+        self.done[name] = (entry["size"], entry["mtime"])
+        self.pending.pop(name, None)
+
+    def run_once(self, force=False):
+        """One poll + at most one batch; returns the batch summary or None"""
+        self.poll()
+        batch = self.next_batch(force=force)
+        return self.process_batch(batch) if batch else None
+
+    def flush(self):
+        """Load everything currently in the directory, ignoring the batch windows"""
+        self.poll()
+        while self.pending:
+            batch = self.next_batch(force=True)
+            if not batch:
+                break
+            self.process_batch(batch)
+
+    def run(self, max_batches=None):
+        """Poll until interrupted (or until max_batches batches were loaded)"""
+        print(f"👀 Watching {self.watch_dir} for {self.pattern} ...")
+        while max_batches is None or self.batches < max_batches:
+            try:
+                if not self.run_once():
+                    time.sleep(self.poll_interval)
+            except Exception as e:
+                print(f"❌ Batch failed and was rolled back: {e}")
+                time.sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        """Ingestion lag and throughput since the daemon started"""
+        now = time.time()
+        uptime = now - self.started_at
+        oldest_pending = min((e["mtime"] for e in self.pending.values()), default=None)
+        return {
+            "batches": self.batches,
+            "files_loaded": self.files_loaded,
+            "rows_loaded": self.rows_loaded,
+            "files_pending": len(self.pending),
+            "files_failed": len(self.failed),
+            "current_lag_seconds": round(now - oldest_pending, 3) if oldest_pending else 0.0,
+            "last_batch": self.last_batch,
+            "rows_per_second": round(self.rows_loaded / uptime, 2) if uptime else 0.0,
+            "rows_per_busy_second": round(self.rows_loaded / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batch ingestion of candidate CSV drops")
+    parser.add_argument("--watch", required=True, help="Directory where CSV files arrive")
+    parser.add_argument("--max-files", type=int, default=50, help="Max files per batch")
+    parser.add_argument("--max-mb", type=float, default=64, help="Max batch size in MB")
+    parser.add_argument("--max-wait", type=float, default=30, help="Max seconds a file waits for its batch")
+    parser.add_argument("--poll", type=float, default=2, help="Seconds between directory scans")
+    parser.add_argument("--sqlite", help="Load into this SQLite file instead of MySQL (local stand-in)")
+    parser.add_argument("--once", action="store_true", help="Load what is there now and exit")
+    parser.add_argument("--precompute", action="store_true",
+                        help="Refresh the HTTP dashboard (server.py) after every batch (MySQL only)")
+    args = parser.parse_args()
+    if args.precompute and args.sqlite:
+        parser.error("--precompute reads the KPIs from MySQL and cannot be combined with --sqlite")
+
+    connect = (lambda: sqlite3.connect(args.sqlite)) if args.sqlite else get_connection
+    daemon = IngestionDaemon(args.watch, connect=connect, max_batch_files=args.max_files,
+                             max_batch_bytes=int(args.max_mb * 1024 * 1024),
+                             max_batch_wait=args.max_wait, poll_interval=args.poll,
+                             precompute=args.precompute)
+    try:
+        if args.once:
+            daemon.flush()
+        else:
+            daemon.run()
+    except KeyboardInterrupt:
+        print("\n👋 Ingestion stopped by user.")
+    print(f"📈 {daemon.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,42 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import mysql.connector
 import pandas as pd
 from etl import extract, transform
 from db import save_to_sql, create_tables
-from connection import get_connection, DB_CONFIG
+from connection import get_connection, get_connection_pool, DB_CONFIG
 from visualization import run_visualization_dashboard
+from query import clear_dimension_cache
+from approx import APPROX_STATE_FILE, build_store
+from server import precompute_dashboard
 
 INPUT_CSV = r"C:\Users\juana\OneDrive\Escritorio\workshop_1\csv\candidates.csv"
 OUTPUT_SQL = Path("workshop.sql")
 
+CHUNK_SIZE = 5000
+PARTITION_ROWS = 10000  # ids per checkpointed partition of the large tables, independent of --workers
+MAX_WORKERS = 32  # mysql-connector pools hold at most 32 connections
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0  # seconds, doubled after every failed attempt
+
+# MySQL error numbers: lock wait timeout, deadlock, can't connect,
+# server has gone away, lost connection during query, lost connection
+TRANSIENT_ERRORS = {1205, 1213, 2003, 2006, 2013, 2055}
+
+DIMENSION_TABLES = [
+    "Dim_Candidate",
+    "Dim_Date",
+    "Dim_Country",
+    "Dim_Seniority",
+    "Dim_Technology",
+    "Dim_ExperienceRange"
+]
+TABLE_ORDER = DIMENSION_TABLES + ["Fact_Application"]
+# Tables with one row per application, loaded as id partitions
+PARTITIONED_TABLES = ["Dim_Candidate", "Fact_Application"]
+
 
 def create_database_if_not_exists():
     """Create the database if it doesn't exist"""
@@ -26,62 +54,271 @@ def create_database_if_not_exists():
         raise
 
 
-def load_data_to_database(dataframes: dict):
-    """Load transformed data directly into MySQL database"""
+def is_transient_error(err) -> bool:
+    """
+    Errors worth retrying: lost connections, lock wait timeouts and deadlocks,
+    and an empty connection pool (the pool does not wait for a connection to
+    be returned, it raises PoolError straight away).
+    """
+    if isinstance(err, mysql.connector.errors.PoolError):
+        return True
+    return getattr(err, "errno", None) in TRANSIENT_ERRORS
+
+
+def close_connection(connection, rollback=False):
+    """Roll back and close a connection that may already be broken; close always runs"""
     try:
-        connection = get_connection()
-        cursor = connection.cursor()
+        if rollback:
+            connection.rollback()
+    except mysql.connector.Error:
+        pass
+    finally:
+        try:
+            connection.close()
+        except mysql.connector.Error:
+            pass
 
-        table_order = [
-            "Dim_Candidate",
-            "Dim_Date",
-            "Dim_Country",
-            "Dim_Seniority",
-            "Dim_Technology",
-            "Dim_ExperienceRange",
-            "Fact_Application"
-        ]
-
-        for table in table_order:
-            df = dataframes.get(table)
-            if df is None or df.empty:
-                print(f"⚠️ Skipping {table} - no data")
-                continue
 
-            columns = list(df.columns)
-            placeholders = ", ".join(["%s"] * len(columns))
-            insert_query = f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+def run_with_retry(action, connection, description, connect=get_connection):
+    """
+    Run action(connection). On a transient error, roll back, close, reconnect
+    and retry with exponential backoff; a failed reconnect uses up an attempt
+    like any other transient error. `connection` may be None to connect on the
+    first attempt. Returns the (possibly new) connection; when an error is
+    finally raised, the connection has already been closed.
+    """
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            if connection is None:
+                connection = connect()
+            action(connection)
+            return connection
+        except Exception as err:
+            if connection is not None:
+                close_connection(connection, rollback=True)
+                connection = None
+            if not is_transient_error(err) or attempt == MAX_RETRIES:
+                raise
+            delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            print(f"⚠️ {description} failed ({err}), retry {attempt}/{MAX_RETRIES - 1} in {delay:.0f}s")
+            time.sleep(delay)
 
-            data = []
-            for _, row in df.iterrows():
-                row_data = [None if pd.isna(v) else v for v in row]
-                data.append(tuple(row_data))
 
-            if data:
-                cursor.executemany(insert_query, data)
-                rows_affected = cursor.rowcount
-                print(f"✅ Processed {len(data)} records for {table} (inserted: {rows_affected})")
-                connection.commit()
+def read_checkpoints(connection) -> dict:
+    """Return {table: (rows_committed, total_rows)} from Etl_Load_Checkpoint"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT table_name, rows_committed, total_rows FROM Etl_Load_Checkpoint")
+    checkpoints = {table: (rows, total) for table, rows, total in cursor.fetchall()}
+    cursor.close()
+    return checkpoints
 
-        cursor.close()
+
+def resume_position(checkpoints: dict, name: str, df: pd.DataFrame) -> int:
+    """Row to continue from for a checkpointed table (or fact partition)"""
+    start, total = checkpoints.get(name, (0, len(df)))
+    if total != len(df):
+        raise ValueError(f"{name} has {len(df)} rows but its checkpoint was taken with "
+                         f"{total}; the input changed, rerun without --resume")
+    if start >= len(df):
+        print(f"⏭️ {name} already loaded ({start} records)")
+    elif start:
+        print(f"🔁 Resuming {name} at record {start} of {len(df)}")
+    return start
+
+
+def prepare_for_load(table: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Give fact rows explicit ids (1..n in transform order) so that every chunk
+    covers a fixed id range and re-inserting it with INSERT IGNORE is a no-op.
+    """
+    if table == "Fact_Application" and "id" not in df.columns:
+        df = df.copy()
+        df.insert(0, "id", range(1, len(df) + 1))
+    return df
+
+
+def load_chunk(connection, table, checkpoint_name, insert_query, chunk: pd.DataFrame,
+               chunk_index, rows_committed, total_rows):
+    """Insert one chunk and advance its checkpoint in the same transaction"""
+    cursor = connection.cursor()
+    values = chunk.astype(object).where(chunk.notna(), None)
+    cursor.executemany(insert_query, [tuple(row) for row in values.itertuples(index=False)])
+    cursor.execute(
+        """
+        INSERT INTO Etl_Load_Checkpoint (table_name, last_chunk, rows_committed, total_rows)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE last_chunk = VALUES(last_chunk),
+            rows_committed = VALUES(rows_committed),
+            total_rows = VALUES(total_rows),
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (checkpoint_name, chunk_index, rows_committed, total_rows)
+    )
+    connection.commit()
+    cursor.close()
+
+
+def load_table(connection, table, df: pd.DataFrame, start=0, chunk_size=CHUNK_SIZE,
+               checkpoint_name=None, connect=get_connection):
+    """
+    Load df[start:] into `table` in checkpointed chunks, retrying transient
+    errors. Returns the connection, which is replaced after a reconnect (and
+    opened with `connect` if None was passed). If an error is raised, the
+    connection has already been closed.
+    """
+    checkpoint_name = checkpoint_name or table
+    columns = list(df.columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    insert_query = f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    for chunk_start in range(start, len(df), chunk_size):
+        chunk_end = min(chunk_start + chunk_size, len(df))
+        chunk_index = chunk_start // chunk_size
+        connection = run_with_retry(
+            lambda conn: load_chunk(conn, table, checkpoint_name, insert_query,
+                                    df.iloc[chunk_start:chunk_end], chunk_index, chunk_end, len(df)),
+            connection,
+            f"{checkpoint_name} chunk {chunk_index}",
+            connect
+        )
+    print(f"✅ Processed {len(df) - start} records for {checkpoint_name}")
+    return connection
+
+
+def id_partitions(table: str, df: pd.DataFrame, size: int = PARTITION_ROWS) -> list:
+    """
+    Split a table whose ids run 1..n in row order (fact ids from
+    prepare_for_load, candidate keys from transform) into fixed id blocks of
+    `size` rows: [(name, rows)]. The blocks, and so their checkpoint names,
+    only depend on the ids, so a load can be resumed with any number of
+    workers, or sequentially.
+    """
+    partitions = []
+    for lo in range(0, len(df), size):
+        partitions.append((f"{table}[{lo + 1}-{lo + size}]", df.iloc[lo:lo + size]))
+    return partitions
+
+
+def load_units(dataframes: dict) -> tuple:
+    """
+    (table, checkpoint name, rows) to load: the small dimensions as a whole,
+    Dim_Candidate and the fact table as id_partitions. Returns the units of
+    the dimensions and of the fact table, which references them.
+    """
+    def units(table):
+        df = prepare_for_load(table, dataframes[table])
+        if df.empty:
+            return []
+        if table in PARTITIONED_TABLES:
+            return [(table, name, part) for name, part in id_partitions(table, df)]
+        return [(table, table, df)]
+
+    dimensions = [unit for table in DIMENSION_TABLES for unit in units(table)]
+    return dimensions, units("Fact_Application")
+
+
+def load_in_parallel(dataframes: dict, checkpoints: dict, workers: int, chunk_size: int) -> int:
+    """
+    Load the dimension units concurrently, then spread the fact partitions
+    over `workers` threads, each worker on its own pooled connection and with
+    its own per-chunk transactions. Returns the number of records loaded.
+    """
+    pool = get_connection_pool(workers)
+
+    def load_part(table, name, df):
+        start = resume_position(checkpoints, name, df)
+        if start >= len(df):
+            return 0
+        # Connecting happens inside the retries; load_table closes the connection on errors
+        connection = load_table(None, table, df, start, chunk_size, name, pool.get_connection)
         connection.close()
-        print("✅ All data loaded successfully into database")
+        return len(df) - start
+
+    dimensions, partitions = load_units(dataframes)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Dimensions first: the fact rows reference them
+        loaded = sum(executor.map(lambda unit: load_part(*unit), dimensions))
+        loaded += sum(executor.map(lambda unit: load_part(*unit), partitions))
+    return loaded
+
+
+def load_data_to_database(dataframes: dict, resume: bool = False, chunk_size: int = CHUNK_SIZE,
+                          workers: int = 1) -> dict:
+    """
+    Load transformed data directly into MySQL database.
+
+    Every table is loaded in chunks of `chunk_size` rows. Each chunk commits
+    together with its row in Etl_Load_Checkpoint, and transient errors are
+    retried with backoff. With resume=True, tables continue after their last
+    committed chunk instead of starting over. With workers > 1 the load runs
+    in parallel over a connection pool (see load_in_parallel).
+
+    Returns {"records", "seconds", "records_per_second"} for the load.
+    """
+    try:
+        started = time.time()
+        connection = get_connection()
+        checkpoints = read_checkpoints(connection) if resume else {}
+        dataframes = {table: dataframes.get(table, pd.DataFrame()) for table in TABLE_ORDER}
+
+        for table, df in dataframes.items():
+            if df is None or df.empty:
+                print(f"⚠️ Skipping {table} - no data")
+                dataframes[table] = pd.DataFrame()
+
+        if workers > 1:
+            connection.close()
+            loaded = load_in_parallel(dataframes, checkpoints, workers, chunk_size)
+        else:
+            loaded = 0
+            dimensions, partitions = load_units(dataframes)
+            for table, name, df in dimensions + partitions:
+                start = resume_position(checkpoints, name, df)
+                if start < len(df):
+                    connection = load_table(connection, table, df, start, chunk_size, name)
+                    loaded += len(df) - start
+            connection.close()
+
+        seconds = time.time() - started
+        stats = {"records": loaded, "seconds": round(seconds, 3),
+                 "records_per_second": round(loaded / seconds, 1) if seconds else 0.0}
+        print(f"✅ All data loaded successfully into database "
+              f"({loaded} records in {stats['seconds']}s, {stats['records_per_second']} records/s)")
+        return stats
     except mysql.connector.Error as err:
         print(f"❌ Error loading data: {err}")
+        print("👉 Rerun with --resume to continue from the last committed chunk")
         raise
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Candidate ETL pipeline")
+    parser.add_argument("--input", default=INPUT_CSV, help="Candidates CSV file")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep existing tables and continue from the last load checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per committed chunk")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Parallel load connections (1 = sequential, at most {MAX_WORKERS})")
+    parser.add_argument("--approx", action="store_true",
+                        help="Build the approximate KPI state (approximate=True / dashboard option 'a')")
+    args = parser.parse_args(argv)
+    if not 1 <= args.workers <= MAX_WORKERS:
+        parser.error(f"--workers must be between 1 and {MAX_WORKERS}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
     try:
         print("🚀 STARTING ETL PIPELINE...")
         print("=" * 50)
 
         print("🔹 STEP 0: Setup Database...")
         create_database_if_not_exists()
-        create_tables()
+        create_tables(drop_existing=not args.resume)
 
         print("🔹 STEP 1: Extract...")
-        raw_df = extract(INPUT_CSV)
+        raw_df = extract(args.input)
 
         print("🔹 STEP 2: Transform...")
         transformed = transform(raw_df)
@@ -89,11 +326,24 @@ def main():
             print(f"{name}: {df.shape}")
 
         print("🔹 STEP 3: Load to Database...")
-        load_data_to_database(transformed)
+        load_data_to_database(transformed, resume=args.resume, chunk_size=args.chunk_size,
+                              workers=args.workers)
+        clear_dimension_cache()
 
         print("🔹 STEP 4: Generate SQL backup...")
         save_to_sql(transformed, OUTPUT_SQL)
 
+        if args.approx:
+            print("🔹 STEP 5: Build approximate KPI state...")
+            build_store(transformed)
+        elif APPROX_STATE_FILE.exists():
+            # A state from an earlier load no longer matches the warehouse
+            APPROX_STATE_FILE.unlink()
+            print(f"🔹 STEP 5: Removed stale {APPROX_STATE_FILE} (rerun with --approx to rebuild it)")
+
+        print("🔹 STEP 6: Precompute dashboard...")
+        precompute_dashboard()
+
         print("\n✅ ETL PIPELINE COMPLETED SUCCESSFULLY!")
         print("=" * 50)
 
@@ -104,6 +354,7 @@ def main():
             run_visualization_dashboard()
         else:
             print("\n👍 ETL completed. You can run visualizations later with: python visualization.py")
+            print("   or serve them over HTTP with: python server.py")
 
     except Exception as e:
         print(f"❌ ETL pipeline failed: {e}")
@@ -1,6 +1,40 @@
 from connection import get_connection
 import pandas as pd
 
+# Dimensions the KPI builder can group or filter by:
+# name -> (table, alias, surrogate key column, label column)
+DIMENSIONS = {
+    "technology": ("Dim_Technology", "dt", "technology_key", "technology_name"),
+    "country": ("Dim_Country", "dc", "country_key", "country_name"),
+    "seniority": ("Dim_Seniority", "ds", "seniority_key", "seniority_name"),
+    "year": ("Dim_Date", "dd", "date_key", "year"),
+    "experience": ("Dim_ExperienceRange", "der", "experience_key", "range_label"),
+}
+
+# Measures the KPI builder can compute over Fact_Application
+MEASURES = {
+    "total_applications": "COUNT(fa.id)",
+    "total_hires": "SUM(fa.hired_flag)",
+    "total_rejected": "COUNT(fa.id) - SUM(fa.hired_flag)",
+    "hire_rate_percentage": "ROUND((SUM(fa.hired_flag) / COUNT(fa.id)) * 100, 2)",
+    "avg_code_score": "ROUND(AVG(fa.code_challenge_score), 2)",
+    "avg_interview_score": "ROUND(AVG(fa.technical_interview_score), 2)",
+    "avg_years_of_experience": "ROUND(AVG(fa.yoe), 1)",
+}
+
+# Decimals each measure is rounded to above; approx.py and cube.py round the same way
+MEASURE_DECIMALS = {"hire_rate_percentage": 2, "avg_code_score": 2, "avg_interview_score": 2,
+                    "avg_years_of_experience": 1}
+
+DEFAULT_MEASURES = ["total_applications", "total_hires", "hire_rate_percentage"]
+
+# Focus countries for KPI 4 (the source data spells the USA in several ways)
+FOCUS_COUNTRIES = ["United States", "USA", "United States of America",
+                   "Brazil", "Colombia", "Ecuador"]
+
+# Cached dimension tables: name -> DataFrame(key, label)
+_dimension_cache = {}
+
 def execute_query(query, description):
     """Execute a SQL query and return results as DataFrame"""
     try:
@@ -13,77 +47,164 @@ def execute_query(query, description):
         print(f"❌ Error executing {description}: {e}")
         return None
 
+# DIMENSION CACHE
+def get_dimension(name):
+    """Return the (key, label) table of a dimension, loading it once per process (None on error)"""
+    if name not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension '{name}'. Available: {', '.join(DIMENSIONS)}")
+    if name not in _dimension_cache:
+        table, _, key_col, label_col = DIMENSIONS[name]
+        df = execute_query(f"SELECT {key_col}, {label_col} FROM {table}", f"Dimension {table}")
+        if df is None:
+            return None
+        _dimension_cache[name] = df
+    return _dimension_cache[name]
+
+def clear_dimension_cache():
+    """Forget cached dimensions (call after the warehouse is reloaded)"""
+    _dimension_cache.clear()
+
+def resolve_filter_keys(name, values):
+    """Translate dimension labels (e.g. country names) into surrogate keys (None on error)"""
+    _, _, key_col, label_col = DIMENSIONS[name]
+    dim = get_dimension(name)
+    if dim is None:
+        return None
+    wanted = {str(v) for v in values}
+    matches = dim[dim[label_col].astype(str).isin(wanted)]
+    return sorted(int(k) for k in matches[key_col])
+
+# KPI BUILDER
+def get_approx_store():
+    """Approximate KPI state saved at load time (see approx.py), or None"""
+    from approx import load_store
+    store = load_store()
+    if store is None:
+        print("⚠️ No approximate KPI state found, running exact queries instead")
+    return store
+
+def build_kpi(dimensions=(), measures=None, filters=None, description=None, approximate=False):
+    """
+    Build and run a KPI query over Fact_Application.
+
+    dimensions: names from DIMENSIONS to group by, e.g. ["country", "year"]
+    measures:   names from MEASURES, defaults to applications/hires/hire rate
+    filters:    {dimension: [labels]}, e.g. {"country": ["Brazil", "Colombia"]}
+
+    Filter labels are resolved to surrogate keys from the cached dimension
+    tables, so the fact table is filtered on its integer key columns and the
+    filtered dimensions never have to be joined. The query runs as a
+    server-side prepared statement with the keys as bound parameters.
+
+    With approximate=True the KPI is estimated from the sample kept by
+    approx.py instead, with a `<measure>_error` column per measure.
+    """
+    dimensions = list(dimensions)
+    measures = list(measures or DEFAULT_MEASURES)
+    filters = filters or {}
+    description = description or f"KPI by {', '.join(dimensions) or 'total'}"
+
+    for name in list(dimensions) + list(filters):
+        if name not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{name}'. Available: {', '.join(DIMENSIONS)}")
+    for name in measures:
+        if name not in MEASURES:
+            raise ValueError(f"Unknown measure '{name}'. Available: {', '.join(MEASURES)}")
+
+    store = get_approx_store() if approximate else None
+    if store is not None:
+        df = store.kpi(dimensions, measures, filters)
+        print(f"✅ {description} (approximate): {len(df)} records")
+        return df
+
+    select_cols, joins, group_cols = [], [], []
+    for name in dimensions:
+        table, alias, key_col, label_col = DIMENSIONS[name]
+        select_cols.append(f"{alias}.{label_col}")
+        joins.append(f"JOIN {table} {alias} ON fa.{key_col} = {alias}.{key_col}")
+        group_cols.append(f"{alias}.{label_col}")
+    select_cols += [f"{MEASURES[m]} AS {m}" for m in measures]
+
+    where, params = [], []
+    for name, values in filters.items():
+        _, _, key_col, _ = DIMENSIONS[name]
+        keys = resolve_filter_keys(name, values)
+        if keys is None:
+            print(f"❌ Error executing {description}: could not resolve {name} filter")
+            return None
+        if not keys:
+            print(f"⚠️ {description}: no {name} matches {list(values)}")
+            return pd.DataFrame(columns=[DIMENSIONS[d][3] for d in dimensions] + measures)
+        where.append(f"fa.{key_col} IN ({', '.join(['%s'] * len(keys))})")
+        params += keys
+
+    query = f"SELECT {', '.join(select_cols)} FROM Fact_Application fa"
+    if joins:
+        query += " " + " ".join(joins)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    if group_cols:
+        query += f" GROUP BY {', '.join(group_cols)} ORDER BY {', '.join(group_cols)}"
+
+    try:
+        connection = get_connection()
+        cursor = connection.cursor(prepared=True)
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+        # Prepared statements return DECIMAL aggregates as Decimal; coerce them to floats
+        df = pd.DataFrame.from_records(rows, columns=cursor.column_names, coerce_float=True)
+        cursor.close()
+        connection.close()
+        print(f"✅ {description}: {len(df)} records")
+        return df
+    except Exception as e:
+        print(f"❌ Error executing {description}: {e}")
+        return None
+
 # KPI 1: HIRES BY TECHNOLOGY
-def kpi_hires_by_technology():
+def kpi_hires_by_technology(filters=None, approximate=False):
     """Get number of hires by technology"""
-    query = """
-    SELECT 
-        dt.technology_name,
-        COUNT(fa.id) as total_applications,
-        SUM(fa.hired_flag) as total_hires,
-        ROUND((SUM(fa.hired_flag) / COUNT(fa.id)) * 100, 2) as hire_rate_percentage
-    FROM Fact_Application fa
-    JOIN Dim_Technology dt ON fa.technology_key = dt.technology_key
-    GROUP BY dt.technology_name
-    ORDER BY total_hires DESC;
-    """
-    return execute_query(query, "Hires by Technology")
+    df = build_kpi(["technology"], filters=filters, description="Hires by Technology",
+                   approximate=approximate)
+    if df is not None:
+        df = df.sort_values("total_hires", ascending=False).reset_index(drop=True)
+    return df
 
 # KPI 2: HIRES BY YEAR
-def kpi_hires_by_year():
+def kpi_hires_by_year(filters=None, approximate=False):
     """Get number of hires by year"""
-    query = """
-    SELECT 
-        dd.year,
-        COUNT(fa.id) as total_applications,
-        SUM(fa.hired_flag) as total_hires,
-        ROUND((SUM(fa.hired_flag) / COUNT(fa.id)) * 100, 2) as hire_rate_percentage
-    FROM Fact_Application fa
-    JOIN Dim_Date dd ON fa.date_key = dd.date_key
-    GROUP BY dd.year
-    ORDER BY dd.year;
-    """
-    return execute_query(query, "Hires by Year")
+    return build_kpi(["year"], filters=filters, description="Hires by Year",
+                   approximate=approximate)
 
 # KPI 3: HIRES BY SENIORITY
-def kpi_hires_by_seniority():
+def kpi_hires_by_seniority(filters=None, approximate=False):
     """Get number of hires by seniority level"""
-    query = """
-    SELECT 
-        ds.seniority_name,
-        COUNT(fa.id) as total_applications,
-        SUM(fa.hired_flag) as total_hires,
-        ROUND((SUM(fa.hired_flag) / COUNT(fa.id)) * 100, 2) as hire_rate_percentage
-    FROM Fact_Application fa
-    JOIN Dim_Seniority ds ON fa.seniority_key = ds.seniority_key
-    GROUP BY ds.seniority_name
-    ORDER BY total_hires DESC;
-    """
-    return execute_query(query, "Hires by Seniority")
+    df = build_kpi(["seniority"], filters=filters, description="Hires by Seniority",
+                   approximate=approximate)
+    if df is not None:
+        df = df.sort_values("total_hires", ascending=False).reset_index(drop=True)
+    return df
 
 # KPI 4: HIRES BY COUNTRY OVER YEARS (Focus: USA, Brazil, Colombia, Ecuador)
-def kpi_hires_by_country_over_years():
+def kpi_hires_by_country_over_years(countries=FOCUS_COUNTRIES, approximate=False):
     """Get hires by specific countries over years"""
-    query = """
-    SELECT 
-        dc.country_name,
-        dd.year,
-        COUNT(fa.id) as total_applications,
-        SUM(fa.hired_flag) as total_hires,
-        ROUND((SUM(fa.hired_flag) / COUNT(fa.id)) * 100, 2) as hire_rate_percentage
-    FROM Fact_Application fa
-    JOIN Dim_Country dc ON fa.country_key = dc.country_key
-    JOIN Dim_Date dd ON fa.date_key = dd.date_key
-    WHERE dc.country_name IN ('United States', 'Brazil', 'Colombia', 'Ecuador', 
-                              'USA', 'United States of America')
-    GROUP BY dc.country_name, dd.year
-    ORDER BY dc.country_name, dd.year;
-    """
-    return execute_query(query, "Hires by Country over Years (Focus Countries)")
+    return build_kpi(["country", "year"], filters={"country": countries},
+                     description="Hires by Country over Years (Focus Countries)",
+                     approximate=approximate)
 
 # KPI 5: HIRE RATE PERCENTAGE BY TECHNOLOGY (Additional KPI)
-def kpi_hire_rate_by_technology():
+def kpi_hire_rate_by_technology(approximate=False):
     """Get detailed hire rate analysis by technology"""
+    store = get_approx_store() if approximate else None
+    if store is not None:
+        df = store.kpi(["technology"], ["total_applications", "total_hires", "total_rejected",
+                                        "hire_rate_percentage", "avg_code_score", "avg_interview_score"],
+                       scored_only=True)
+        df = df[df["total_applications"] >= 10]
+        df = df.sort_values("hire_rate_percentage", ascending=False).reset_index(drop=True)
+        print(f"✅ Hire Rate Analysis by Technology (approximate): {len(df)} records")
+        return df
+
     query = """
     SELECT 
         dt.technology_name,
@@ -104,8 +225,19 @@ def kpi_hire_rate_by_technology():
     return execute_query(query, "Hire Rate Analysis by Technology")
 
 # KPI 6: AVERAGE SCORES BY EXPERIENCE RANGE (Additional KPI)
-def kpi_scores_by_experience():
+def kpi_scores_by_experience(approximate=False):
     """Get average scores and hire rates by experience range"""
+    store = get_approx_store() if approximate else None
+    if store is not None:
+        df = store.kpi(["experience"], ["total_applications", "total_hires", "hire_rate_percentage",
+                                         "avg_code_score", "avg_interview_score", "avg_years_of_experience"],
+                       scored_only=True)
+        df = df.rename(columns=lambda c: c.replace("avg_code_score", "avg_code_challenge_score")
+                       .replace("avg_interview_score", "avg_technical_interview_score"))
+        df = df.sort_values("min_years").reset_index(drop=True)
+        print(f"✅ Performance Analysis by Experience Range (approximate): {len(df)} records")
+        return df
+
     query = """
     SELECT 
         der.range_label,
@@ -127,25 +259,31 @@ def kpi_scores_by_experience():
     return execute_query(query, "Performance Analysis by Experience Range")
 
 # CONSOLIDATED DASHBOARD DATA
-def get_all_kpis():
+def get_all_kpis(approximate=False):
     """Execute all KPI queries and return results"""
     print("🔹 Executing All KPI Queries...")
     
     kpis = {
-        'hires_by_technology': kpi_hires_by_technology(),
-        'hires_by_year': kpi_hires_by_year(),
-        'hires_by_seniority': kpi_hires_by_seniority(),
-        'hires_by_country_years': kpi_hires_by_country_over_years(),
-        'hire_rate_by_technology': kpi_hire_rate_by_technology(),
-        'scores_by_experience': kpi_scores_by_experience()
+        'hires_by_technology': kpi_hires_by_technology(approximate=approximate),
+        'hires_by_year': kpi_hires_by_year(approximate=approximate),
+        'hires_by_seniority': kpi_hires_by_seniority(approximate=approximate),
+        'hires_by_country_years': kpi_hires_by_country_over_years(approximate=approximate),
+        'hire_rate_by_technology': kpi_hire_rate_by_technology(approximate=approximate),
+        'scores_by_experience': kpi_scores_by_experience(approximate=approximate)
     }
     
     print("✅ All KPI queries completed!")
     return kpis
 
 # SUMMARY STATISTICS
-def get_summary_stats():
+def get_summary_stats(approximate=False):
     """Get overall summary statistics"""
+    store = get_approx_store() if approximate else None
+    if store is not None:
+        df = store.summary()
+        print(f"✅ Overall Summary Statistics (approximate): {len(df)} records")
+        return df
+
     query = """
     SELECT 
         COUNT(fa.id) as total_applications,
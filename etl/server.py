@@ -0,0 +1,260 @@
+import argparse
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+import matplotlib
+import matplotlib.pyplot as plt
+from query import get_all_kpis, get_summary_stats, clear_dimension_cache
+from visualization import (
+    plot_hires_by_technology,
+    plot_hires_by_year,
+    plot_hires_by_seniority,
+    plot_hires_by_country_years,
+    plot_hire_rate_analysis,
+    plot_experience_analysis
+)
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow output is optional
+    pa = None
+
+DASHBOARD_DIR = Path("dashboard_cache")
+MANIFEST_FILE = "manifest.json"
+
+# KPI name (as returned by get_all_kpis) -> chart renderer
+CHARTS = {
+    "hires_by_technology": plot_hires_by_technology,
+    "hires_by_year": plot_hires_by_year,
+    "hires_by_seniority": plot_hires_by_seniority,
+    "hires_by_country_years": plot_hires_by_country_years,
+    "hire_rate_by_technology": plot_hire_rate_analysis,
+    "scores_by_experience": plot_experience_analysis,
+}
+
+CONTENT_TYPES = {
+    ".json": "application/json",
+    ".arrow": "application/vnd.apache.arrow.file",
+    ".png": "image/png",
+    ".html": "text/html; charset=utf-8",
+}
+
+
+# ==============================
+# PRECOMPUTE (run after each load)
+# ==============================
+def _render_chart(plot, df) -> bytes:
+    fig = plt.figure()
+    plot(df, show=False)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=100)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def _render_index(names, load_id, loaded_at) -> bytes:
+    items = "\n".join(
+        f'<h2>{name}</h2>'
+        f'<p><a href="/kpi/{name}.json">JSON</a>'
+        + (f' · <a href="/kpi/{name}.arrow">Arrow</a>' if pa is not None else "")
+        + '</p>'
+        + (f'<img src="/chart/{name}.png" alt="{name}">' if name in CHARTS else "")
+        for name in names
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Candidate Analysis Dashboard</title></head>
+<body>
+<h1>Candidate Analysis Dashboard</h1>
+<p>Load {load_id} · {formatdate(loaded_at, usegmt=True)}</p>
+{items}
+</body></html>""".encode("utf-8")
+
+
+def precompute_dashboard(output_dir=DASHBOARD_DIR, approximate=False) -> str:
+    """
+    Run every KPI once and write its JSON (and Arrow, if pyarrow is installed)
+    plus the rendered chart into a new load directory, then point the
+    manifest at it. Returns the load id the server uses for its ETags.
+    """
+    # Runs after every load: labels that are new since the last one must resolve
+    clear_dimension_cache()
+    output_dir = Path(output_dir)
+    load_id = time.strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:8]
+    load_dir = output_dir / load_id
+    (load_dir / "kpi").mkdir(parents=True)
+    (load_dir / "chart").mkdir()
+
+    kpis = get_all_kpis(approximate=approximate)
+    kpis["summary"] = get_summary_stats(approximate=approximate)
+
+    names = []
+    for name, df in kpis.items():
+        if df is None:
+            print(f"⚠️ Skipping {name} - query failed")
+            continue
+        (load_dir / "kpi" / f"{name}.json").write_text(df.to_json(orient="records"), encoding="utf-8")
+        if pa is not None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            (load_dir / "kpi" / f"{name}.arrow").write_bytes(sink.getvalue().to_pybytes())
+        if name in CHARTS and not df.empty:
+            (load_dir / "chart" / f"{name}.png").write_bytes(_render_chart(CHARTS[name], df))
+        names.append(name)
+
+    # Whole seconds, like the Last-Modified header, and always past the previous load
+    loaded_at = int(time.time())
+    previous = output_dir / MANIFEST_FILE
+    if previous.exists():
+        loaded_at = max(loaded_at, int(json.loads(previous.read_text(encoding="utf-8"))["loaded_at"]) + 1)
+    (load_dir / "index.html").write_bytes(_render_index(names, load_id, loaded_at))
+
+    # Swap the manifest atomically so the server never sees a half-written load
+    manifest = {"load_id": load_id, "loaded_at": loaded_at, "kpis": names}
+    temp = output_dir / (MANIFEST_FILE + ".tmp")
+    temp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(temp, output_dir / MANIFEST_FILE)
+
+    # Keep the previous load around for requests that are still in flight
+    loads = sorted((p for p in output_dir.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime)
+    for old in loads[:-2]:
+        shutil.rmtree(old, ignore_errors=True)
+
+    print(f"✅ Dashboard precomputed for load {load_id} ({len(names)} KPIs) in {output_dir}")
+    return load_id
+
+
+# ==============================
+# HTTP SERVICE
+# ==============================
+class DashboardCache:
+    """In-memory copy of the latest precomputed load, reloaded when the manifest changes"""
+
+    def __init__(self, output_dir=DASHBOARD_DIR):
+        self.output_dir = Path(output_dir)
+        self.lock = threading.Lock()
+        self.manifest_mtime = None
+        self.load_id = None
+        self.loaded_at = None
+        self.files = {}  # url path -> bytes
+
+    def refresh(self):
+        manifest_path = self.output_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            return
+        mtime = manifest_path.stat().st_mtime
+        if mtime == self.manifest_mtime:
+            return
+        with self.lock:
+            if mtime == self.manifest_mtime:
+                return
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            load_dir = self.output_dir / manifest["load_id"]
+            files = {"/": (load_dir / "index.html").read_bytes()}
+            for path in load_dir.rglob("*"):
+                if path.is_file() and path.name != "index.html":
+                    files["/" + path.relative_to(load_dir).as_posix()] = path.read_bytes()
+            self.files, self.load_id, self.loaded_at = files, manifest["load_id"], manifest["loaded_at"]
+            self.manifest_mtime = mtime
+            print(f"🔄 Serving load {self.load_id} ({len(files)} files)")
+
+    def snapshot(self):
+        """(files, load_id, loaded_at) of the current load, read consistently"""
+        self.refresh()
+        with self.lock:
+            return self.files, self.load_id, self.loaded_at
+
+
+def make_handler(cache: DashboardCache):
+    class DashboardHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            files, load_id, loaded_at = cache.snapshot()
+            if path == "/kpis" and load_id is not None:
+                kpis = sorted(p[len("/kpi/"):-len(".json")] for p in files if p.endswith(".json"))
+                body = json.dumps({"load_id": load_id, "loaded_at": loaded_at, "kpis": kpis}).encode("utf-8")
+                suffix = ".json"
+            else:
+                body = files.get(path)
+                suffix = Path(path).suffix or ".html"
+
+            if body is None:
+                message = "No precomputed load yet" if load_id is None else "Not found"
+                self.send_error(503 if load_id is None else 404, message)
+                return
+
+            etag = f'"{load_id}:{path}"'
+            last_modified = formatdate(loaded_at, usegmt=True)
+            if self._not_modified(etag, loaded_at):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPES.get(suffix, "application/octet-stream"))
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _not_modified(self, etag, loaded_at) -> bool:
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match is not None:
+                return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+            if_modified_since = self.headers.get("If-Modified-Since")
+            if if_modified_since:
+                # loaded_at is whole seconds and unique per load (see precompute_dashboard)
+                try:
+                    return int(parsedate_to_datetime(if_modified_since).timestamp()) >= int(loaded_at)
+                except (TypeError, ValueError):
+                    return False
+            return False
+
+        def log_message(self, format, *args):
+            pass
+
+    return DashboardHandler
+
+
+def run_server(host="127.0.0.1", port=8050, output_dir=DASHBOARD_DIR):
+    """Serve the latest precomputed load; requests are handled on separate threads"""
+    cache = DashboardCache(output_dir)
+    cache.refresh()
+    server = ThreadingHTTPServer((host, port), make_handler(cache))
+    print(f"🌐 Dashboard running on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Dashboard server stopped.")
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP dashboard for precomputed KPIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--dir", default=str(DASHBOARD_DIR), help="Directory of precomputed loads")
+    parser.add_argument("--precompute", action="store_true", help="Query MySQL and precompute before serving")
+    args = parser.parse_args()
+
+    matplotlib.use("Agg")
+    if args.precompute:
+        precompute_dashboard(args.dir)
+    run_server(args.host, args.port, args.dir)
+
+
+if __name__ == "__main__":
+    main()
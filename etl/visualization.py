@@ -8,7 +8,10 @@ from query import (
     kpi_hires_by_country_over_years,
     kpi_hire_rate_by_technology,
     kpi_scores_by_experience,
-    get_summary_stats
+    get_summary_stats,
+    build_kpi,
+    DIMENSIONS,
+    MEASURES
 )
 
 plt.style.use('default')
@@ -18,6 +21,9 @@ plt.rcParams['font.size'] = 11
 plt.rcParams['axes.spines.top'] = False
 plt.rcParams['axes.spines.right'] = False
 
+# When True, KPIs are estimated from the sample built at load time (see approx.py)
+approximate_mode = False
+
 def clear_screen():
     import os
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -34,12 +40,15 @@ def show_menu():
     print("4️⃣  Hires by Country over Years (USA, Brazil, Colombia, Ecuador)")
     print("5️⃣  Hire Rate Analysis (Top Technologies)")
     print("6️⃣  Experience Analysis")
+    print("7️⃣  Custom Slice (any dimensions, measures and filters)")
+    print(f"🅰️  Toggle approximate mode (currently {'ON' if approximate_mode else 'OFF'})")
     print("0️⃣  Exit\n")
     print("=" * 70)
 
 # 1. Hires by Technology
-def plot_hires_by_technology():
-    df = kpi_hires_by_technology()
+def plot_hires_by_technology(df=None, show=True):
+    if df is None:
+        df = kpi_hires_by_technology(approximate=approximate_mode)
     if df is None or df.empty:
         print("No data available")
         return
@@ -53,11 +62,13 @@ def plot_hires_by_technology():
     plt.grid(axis="y", alpha=0.3, linestyle="--")
 
     plt.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
 
 # 2. Hires by Year
-def plot_hires_by_year():
-    df = kpi_hires_by_year()
+def plot_hires_by_year(df=None, show=True):
+    if df is None:
+        df = kpi_hires_by_year(approximate=approximate_mode)
     if df is None or df.empty:
         print("No data available")
         return
@@ -68,11 +79,13 @@ def plot_hires_by_year():
     plt.ylabel("Total Hires")
     plt.grid(True, alpha=0.4, linestyle="--")
     plt.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
 
 # 3. Hires by Seniority
-def plot_hires_by_seniority():
-    df = kpi_hires_by_seniority()
+def plot_hires_by_seniority(df=None, show=True):
+    if df is None:
+        df = kpi_hires_by_seniority(approximate=approximate_mode)
     if df is None or df.empty:
         print("No data available")
         return
@@ -85,16 +98,17 @@ def plot_hires_by_seniority():
     plt.setp(autotexts, size=9, weight="bold", color="black")
     plt.title("Hire Distribution by Seniority Level", fontsize=14, weight="bold")
     plt.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
 
 # 4. Hires by Country (focus countries only)
-def plot_hires_by_country_years():
-    df = kpi_hires_by_country_over_years()
+def plot_hires_by_country_years(df=None, show=True):
+    if df is None:
+        df = kpi_hires_by_country_over_years(approximate=approximate_mode)
     if df is None or df.empty:
         print("No data available")
         return
-    focus = ["USA", "Brazil", "Colombia", "Ecuador"]
-    for country in focus:
+    for country in df['country_name'].unique():
         country_data = df[df['country_name'] == country]
         plt.plot(country_data['year'], country_data['total_hires'],
                  marker='o', linewidth=2, label=country)
@@ -104,11 +118,13 @@ def plot_hires_by_country_years():
     plt.legend(frameon=False)
     plt.grid(True, alpha=0.3, linestyle="--")
     plt.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
 
 # 5. Hire Rate Analysis (Top techs only)
-def plot_hire_rate_analysis():
-    df = kpi_hire_rate_by_technology()
+def plot_hire_rate_analysis(df=None, show=True):
+    if df is None:
+        df = kpi_hire_rate_by_technology(approximate=approximate_mode)
     if df is None or df.empty:
         print("No data available")
         return
@@ -120,11 +136,13 @@ def plot_hire_rate_analysis():
     plt.grid(axis="x", alpha=0.3, linestyle="--")
 
     plt.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
 
 # 6. Experience Analysis
-def plot_experience_analysis():
-    df = kpi_scores_by_experience()
+def plot_experience_analysis(df=None, show=True):
+    if df is None:
+        df = kpi_scores_by_experience(approximate=approximate_mode)
     if df is None or df.empty:
         print("No data available")
         return
@@ -140,12 +158,40 @@ def plot_experience_analysis():
                  f"{bar.get_height():.1f}%", ha="center", va="bottom", fontsize=9)
 
     plt.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
+
+# 7. Custom slice built from user input
+def show_custom_slice():
+    print(f"\nDimensions: {', '.join(DIMENSIONS)}")
+    print(f"Measures: {', '.join(MEASURES)}")
+    dims = input("👉 Group by (comma separated, blank for totals): ").strip()
+    measures = input("👉 Measures (comma separated, blank for defaults): ").strip()
+    filters_text = input("👉 Filters (e.g. country=Brazil|Colombia; year=2020): ").strip()
+
+    filters = {}
+    for part in filters_text.split(";"):
+        if "=" in part:
+            name, values = part.split("=", 1)
+            filters[name.strip()] = [v.strip() for v in values.split("|") if v.strip()]
+
+    try:
+        df = build_kpi([d.strip() for d in dims.split(",") if d.strip()],
+                       [m.strip() for m in measures.split(",") if m.strip()] or None,
+                       filters, description="Custom Slice", approximate=approximate_mode)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    if df is None or df.empty:
+        print("No data available")
+        return
+    print("\n" + df.to_string(index=False))
 
 def run_visualization_dashboard():
+    global approximate_mode
     while True:
         show_menu()
-        choice = input("👉 Select an option (0-6): ").strip()
+        choice = input("👉 Select an option (0-7, a): ").strip().lower()
         if choice == '0':
             print("\n👋 Thank you for using the Candidate Analysis Dashboard!")
             break
@@ -161,6 +207,11 @@ def run_visualization_dashboard():
             plot_hire_rate_analysis()
         elif choice == '6':
             plot_experience_analysis()
+        elif choice == '7':
+            show_custom_slice()
+        elif choice == 'a':
+            approximate_mode = not approximate_mode
+            print(f"Approximate mode {'ON' if approximate_mode else 'OFF'}")
         else:
             print("❌ Invalid option.")
         if choice != '0':
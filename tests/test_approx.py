@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+from approx import ApproxStore, HyperLogLog, StratifiedReservoir, SAMPLE_COLUMNS, load_store, update_saved_store
+from cube import StarCube
+
+
+def make_dataframes(n, technologies=20, countries=60, years=4, seed=0):
+    """Star schema in transform() layout with many sparse technology/country/year combinations"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2019-01-01", periods=years * 365, freq="D")
+    yoe = rng.integers(0, 20, n).astype(float)
+    code = rng.integers(0, 11, n).astype(float)
+    code[rng.random(n) < 0.1] = np.nan
+    interview = rng.integers(0, 11, n).astype(float)
+    fact = pd.DataFrame({
+        "candidate_key": np.arange(1, n + 1),
+        "date_key": rng.integers(1, len(dates) + 1, n),
+        "country_key": rng.integers(1, countries + 1, n),
+        "seniority_key": rng.integers(1, 5, n),
+        # Skewed technology mix, so strata have very different sizes
+        "technology_key": np.minimum(rng.geometric(0.15, n), technologies),
+        "experience_key": np.digitize(yoe, [1, 3, 5, 8]) + 1,
+        "code_challenge_score": code,
+        "technical_interview_score": interview,
+        "hired_flag": ((code >= 7) & (interview >= 7)).astype(int),
+        "yoe": yoe,
+    })
+    return {
+        "Dim_Date": pd.DataFrame({"date_key": np.arange(1, len(dates) + 1), "year": dates.year}),
+        "Dim_Country": pd.DataFrame({"country_key": np.arange(1, countries + 1),
+                                     "country_name": [f"Country {i}" for i in range(1, countries + 1)]}),
+        "Dim_Seniority": pd.DataFrame({"seniority_key": [1, 2, 3, 4],
+                                       "seniority_name": ["Intern", "Junior", "Mid", "Senior"]}),
+        "Dim_Technology": pd.DataFrame({"technology_key": np.arange(1, technologies + 1),
+                                        "technology_name": [f"Tech {i:02d}" for i in range(1, technologies + 1)]}),
+        "Dim_ExperienceRange": pd.DataFrame({"experience_key": [1, 2, 3, 4, 5],
+                                             "range_label": ["0-1", "1-3", "3-5", "5-8", "8+"],
+                                             "min_years": [0, 1, 3, 5, 8],
+                                             "max_years": [1, 3, 5, 8, None]}),
+        "Fact_Application": fact,
+    }
+
+
+def within_bounds(exact, approx, measure, slack=0.0):
+    return ((exact[measure] - approx[measure]).abs() <= approx[f"{measure}_error"] + slack).to_numpy()
+
+
+def test_hyperloglog_counts_within_its_error():
+    sketch, other = HyperLogLog(), HyperLogLog()
+    sketch.add(np.arange(0, 30000))
+    other.add(np.arange(20000, 50000))
+    assert abs(sketch.count() - 30000) <= 3 * sketch.relative_error * 30000
+    sketch.merge(other)
+    assert abs(sketch.count() - 50000) <= 3 * sketch.relative_error * 50000
+
+    small = HyperLogLog()
+    small.add(["a", "b", "c", None, "a"])
+    assert round(small.count()) == 3
+
+
+def test_sample_size_is_bounded_however_many_strata_there_are():
+    dataframes = make_dataframes(30000)
+    fact = dataframes["Fact_Application"].copy()
+    fact["year"] = 2020
+    reservoir = StratifiedReservoir(capacity=1000, min_per_stratum=5)
+    for lo in range(0, len(fact), 4500):
+        reservoir.add(fact.iloc[lo:lo + 4500])
+
+    frame = reservoir.frame()
+    assert 1000 <= len(frame) <= 1000 + 5 * fact["technology_key"].nunique()
+    # Every stratum is represented, even the smallest ones
+    assert frame.groupby("stratum")["n"].first().min() == min(5, fact.groupby("technology_key").size().min())
+    assert reservoir.seen == 30000
+    assert reservoir.population.sum() == 30000
+    # Each row's stratum size is the exact population of its technology/year
+    exact = fact.groupby("technology_key").size()
+    assert (frame["N"].to_numpy() == exact.reindex(frame["technology_key"]).to_numpy()).all()
+    assert (frame.groupby("stratum")["n"].first() == frame.groupby("stratum").size()).all()
+
+
+def test_full_sample_gives_exact_answers():
+    dataframes = make_dataframes(3000)
+    store = ApproxStore(capacity=5000)
+    store.update(dataframes)
+    cube = StarCube.from_transformed(dataframes)
+
+    measures = ["total_applications", "total_hires", "hire_rate_percentage", "avg_code_score"]
+    exact = cube.kpi(["technology", "year"], measures)
+    approx = store.kpi(["technology", "year"], measures)
+    for m in measures:
+        assert np.allclose(exact[m].astype(float), approx[m].astype(float), equal_nan=True)
+        assert (approx[f"{m}_error"].fillna(0) == 0).all()
+
+
+def test_estimates_fall_within_their_error_bounds():
+    dataframes = make_dataframes(40000)
+    store = ApproxStore(capacity=4000)
+    # Loaded in batches, like the ingestion daemon does
+    fact = dataframes["Fact_Application"]
+    for lo in range(0, len(fact), 10000):
+        store.update({**dataframes, "Fact_Application": fact.iloc[lo:lo + 10000]})
+    assert len(store.reservoir.sample) <= 4000 + 20 * 20 * 4
+    cube = StarCube.from_transformed(dataframes)
+
+    measures = ["total_applications", "hire_rate_percentage", "avg_code_score"]
+    exact = cube.kpi(["year"], measures)
+    approx = store.kpi(["year"], measures)
+    for m in measures:
+        assert within_bounds(exact, approx, m, slack=0.01).all()
+
+    # ~95% intervals: allow a few misses over the technology groups
+    exact = cube.kpi(["technology"], measures, filters={"seniority": ["Junior", "Senior"]})
+    approx = store.kpi(["technology"], measures, filters={"seniority": ["Junior", "Senior"]})
+    assert approx["technology_name"].tolist() == exact["technology_name"].tolist()
+    for m in measures:
+        assert within_bounds(exact, approx, m, slack=0.01).mean() >= 0.85
+
+    summary = store.summary().iloc[0]
+    exact_summary = cube.summary().iloc[0]
+    for m in ["total_applications", "unique_candidates", "total_countries"]:
+        assert abs(summary[m] - exact_summary[m]) <= summary[f"{m}_error"]
+    assert summary["overall_hire_rate"] == pytest.approx(exact_summary["overall_hire_rate"],
+                                                         abs=summary["overall_hire_rate_error"])
+
+
+def test_saved_state_is_folded_and_reused(tmp_path):
+    dataframes = make_dataframes(2000)
+    path = tmp_path / "approx_state.pkl"
+    assert update_saved_store(dataframes, path) is None  # nothing to update before a full load
+
+    ApproxStore(capacity=500).save(path)
+    store = update_saved_store(dataframes, path)
+    assert load_store(path) is store
+    assert store.reservoir.seen == 2000
+    assert store.kpi(["year"])["total_applications"].sum() == 2000
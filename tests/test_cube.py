@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from cube import StarCube
+from etl import extract, transform
+
+HEADER = ("First Name;Last Name;Email;Application Date;Country;YOE;Seniority;"
+          "Technology;Code Challenge Score;Technical Interview Score\n")
+ROWS = [
+    ("2020-01-10", "Brazil", 2, "Junior", "Java", 8, 9),
+    ("2020-05-02", "Brazil", 6, "Senior", "Go", 3, ""),
+    ("2021-03-01", "Chile", 9, "Senior", "Java", 7, 7),
+    ("2021-07-15", "Brazil", 4, "Junior", "Java", 9, 4),
+    ("2021-07-15", "Peru", 1, "Junior", "Go", 10, 10),
+]
+
+
+def make_cube(tmp_path):
+    lines = [f"Ana;Diaz;a{i}@x.com;{date};{country};{yoe};{seniority};{tech};{code};{interview}\n"
+             for i, (date, country, yoe, seniority, tech, code, interview) in enumerate(ROWS)]
+    path = tmp_path / "candidates.csv"
+    path.write_text(HEADER + "".join(lines), encoding="utf-8")
+    return StarCube.from_transformed(transform(extract(str(path))))
+
+
+def test_slice_matches_the_source_rows(tmp_path):
+    cube = make_cube(tmp_path)
+    df = cube.kpi(["technology", "year"], ["total_applications", "total_hires", "avg_interview_score"],
+                  filters={"country": ["Brazil"]})
+    assert df["technology_name"].tolist() == ["Go", "Java", "Java"]
+    assert df["year"].tolist() == [2020, 2020, 2021]
+    assert df["total_applications"].tolist() == [1, 1, 1]
+    assert df["total_hires"].tolist() == [0, 1, 0]
+    assert np.isnan(df["avg_interview_score"].iloc[0])
+    assert df["avg_interview_score"].iloc[1:].tolist() == [9.0, 4.0]
+
+
+def test_arrays_and_frame_paths_agree(tmp_path):
+    cube = make_cube(tmp_path)
+    args = (["seniority"], ["total_applications", "hire_rate_percentage", "avg_years_of_experience"])
+    arrays = cube.kpi_arrays(*args, scored_only=True)
+    assert list(arrays) == ["seniority_name", "total_applications", "hire_rate_percentage",
+                            "avg_years_of_experience"]
+    assert all(isinstance(values, np.ndarray) for values in arrays.values())
+    pd.testing.assert_frame_equal(cube.kpi(*args, scored_only=True), pd.DataFrame(arrays))
+    assert arrays["hire_rate_percentage"].tolist() == [66.67, 100.0]
+    assert arrays["avg_years_of_experience"].tolist() == [2.3, 9.0]
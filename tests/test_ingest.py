@@ -0,0 +1,193 @@
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import ingest
+from ingest import IngestionDaemon
+
+HEADER = ("First Name;Last Name;Email;Application Date;Country;YOE;Seniority;"
+          "Technology;Code Challenge Score;Technical Interview Score\n")
+
+
+def write_csv(path, rows):
+    lines = [f"Ana;Diaz;{email};{date};{country};{yoe};Junior;{tech};{code};{interview}\n"
+             for email, date, country, yoe, tech, code, interview in rows]
+    path.write_text(HEADER + "".join(lines), encoding="utf-8")
+
+
+def make_daemon(tmp_path, db_path, **kwargs):
+    return IngestionDaemon(tmp_path / "incoming", connect=lambda: sqlite3.connect(db_path),
+                           approx_state=tmp_path / "approx_state.pkl", **kwargs)
+
+
+def query(db_path, sql):
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute(sql).fetchall()
+    finally:
+        connection.close()
+
+
+def test_batches_are_appended_and_rekeyed_against_existing_dimensions(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    db_path = tmp_path / "warehouse.db"
+    write_csv(incoming / "a.csv", [("a1@x.com", "2021-03-01", "Brazil", 2, "Java", 8, 9),
+                                   ("a2@x.com", "2021-03-02", "Chile", 6, "Go", 3, 4)])
+    write_csv(incoming / "b.csv", [("b1@x.com", "2021-03-01", "Brazil", 9, "Go", 7, 7)])
+
+    daemon = make_daemon(tmp_path, db_path, max_batch_files=1)
+    daemon.flush()
+
+    assert daemon.stats()["files_loaded"] == 2
+    assert daemon.stats()["rows_loaded"] == 3
+    assert query(db_path, "SELECT country_name FROM Dim_Country ORDER BY country_key") == [("Brazil",), ("Chile",)]
+    assert query(db_path, "SELECT COUNT(*) FROM Dim_Date") == [(2,)]
+    assert query(db_path, "SELECT COUNT(DISTINCT id), COUNT(DISTINCT candidate_key) FROM Fact_Application") == [(3, 3)]
+    # Every fact row points at an existing dimension row
+    assert query(db_path, """
+        SELECT COUNT(*) FROM Fact_Application f
+        LEFT JOIN Dim_Country c ON f.country_key = c.country_key
+        LEFT JOIN Dim_Technology t ON f.technology_key = t.technology_key
+        WHERE c.country_key IS NULL OR t.technology_key IS NULL
+    """) == [(0,)]
+    assert query(db_path, "SELECT SUM(hired_flag) FROM Fact_Application") == [(2,)]
+
+
+def test_files_are_loaded_exactly_once_across_restarts(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    db_path = tmp_path / "warehouse.db"
+    write_csv(incoming / "a.csv", [("a1@x.com", "2021-03-01", "Brazil", 2, "Java", 8, 9)])
+    make_daemon(tmp_path, db_path).flush()
+
+    write_csv(incoming / "b.csv", [("b1@x.com", "2022-01-05", "Peru", 4, "Go", 5, 9)])
+    restarted = make_daemon(tmp_path, db_path)
+    restarted.flush()
+
+    assert restarted.stats()["files_loaded"] == 1
+    assert query(db_path, "SELECT COUNT(*) FROM Fact_Application") == [(2,)]
+    assert query(db_path, "SELECT file_name FROM Etl_Ingest_Manifest ORDER BY file_name") == [("a.csv",), ("b.csv",)]
+
+
+def test_bad_file_is_skipped_without_blocking_the_batch(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    db_path = tmp_path / "warehouse.db"
+    # Parses as CSV but has none of the columns transform() needs
+    (incoming / "0bad.csv").write_text("foo;bar\n1;2\n", encoding="utf-8")
+    write_csv(incoming / "good.csv", [("g1@x.com", "2021-03-01", "Brazil", 2, "Java", 8, 9)])
+
+    daemon = make_daemon(tmp_path, db_path)
+    daemon.poll()
+    daemon.poll()
+    assert daemon.run_once(force=True)["files"] == 1
+    assert daemon.run_once() is None
+
+    stats = daemon.stats()
+    assert stats["files_loaded"] == 1
+    assert stats["files_failed"] == 1
+    assert stats["files_pending"] == 0
+    assert query(db_path, "SELECT file_name FROM Etl_Ingest_Manifest") == [("good.csv",)]
+
+
+def test_file_is_given_up_after_repeated_load_failures(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    write_csv(incoming / "a.csv", [("a1@x.com", "2021-03-01", "Brazil", 2, "Java", 8, 9)])
+
+    daemon = make_daemon(tmp_path, tmp_path / "warehouse.db", max_attempts=2, poll_interval=0)
+    # A database without the warehouse tables makes every load fail and roll back
+    daemon.connect = lambda: sqlite3.connect(tmp_path / "empty.db")
+    daemon.poll()
+    daemon.poll()
+    for _ in range(3):
+        try:
+            daemon.run_once(force=True)
+        except sqlite3.OperationalError:
+            pass
+
+    stats = daemon.stats()
+    assert stats["files_failed"] == 1
+    assert stats["files_pending"] == 0
+    assert stats["files_loaded"] == 0
+
+
+def test_precompute_needs_the_mysql_warehouse(tmp_path):
+    with pytest.raises(ValueError):
+        make_daemon(tmp_path, tmp_path / "warehouse.db", precompute=True)
+
+
+def test_daemon_does_not_import_the_dashboard_stack():
+    code = "import sys, ingest; print('server' in sys.modules, 'matplotlib' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=Path(ingest.__file__).parent)
+    assert result.stdout.split()[-2:] == ["False", "False"]
+
+
+def test_failing_post_load_hooks_do_not_undo_a_committed_batch(tmp_path, monkeypatch):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    db_path = tmp_path / "warehouse.db"
+    write_csv(incoming / "a.csv", [("a1@x.com", "2021-03-01", "Brazil", 2, "Java", 8, 9)])
+
+    def broken_store(rows, path):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ingest, "update_saved_store", broken_store)
+    daemon = make_daemon(tmp_path, db_path, max_attempts=1)
+    daemon.flush()
+    daemon.flush()
+
+    stats = daemon.stats()
+    assert stats["files_loaded"] == 1
+    assert stats["files_failed"] == 0
+    assert stats["files_pending"] == 0
+    assert query(db_path, "SELECT COUNT(*) FROM Fact_Application") == [(1,)]
+
+
+def test_reused_file_name_is_loaded_again_only_with_new_content(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    db_path = tmp_path / "warehouse.db"
+    drop = incoming / "candidates.csv"
+    write_csv(drop, [("a1@x.com", "2021-03-01", "Brazil", 2, "Java", 8, 9)])
+    daemon = make_daemon(tmp_path, db_path)
+    daemon.flush()
+
+    # Same content written again (new mtime): still loaded once, also after a restart
+    write_csv(drop, [("a1@x.com", "2021-03-01", "Brazil", 2, "Java", 8, 9)])
+    daemon.flush()
+    make_daemon(tmp_path, db_path).flush()
+    assert query(db_path, "SELECT COUNT(*) FROM Fact_Application") == [(1,)]
+
+    # Next day's drop under the same name
+    write_csv(drop, [("b1@x.com", "2021-03-02", "Chile", 5, "Go", 9, 9),
+                     ("b2@x.com", "2021-03-02", "Chile", 1, "Go", 2, 9)])
+    daemon.flush()
+    assert daemon.stats()["files_loaded"] == 2
+    assert query(db_path, "SELECT COUNT(*) FROM Fact_Application") == [(3,)]
+    assert query(db_path, "SELECT file_name, rows_loaded FROM Etl_Ingest_Manifest ORDER BY rows_loaded") == [
+        ("candidates.csv", 1), ("candidates.csv", 2)]
+
+
+def test_stand_in_database_never_touches_the_warehouse_state(tmp_path):
+    connect = lambda: sqlite3.connect(tmp_path / "warehouse.db")
+    assert IngestionDaemon(tmp_path, connect=connect).approx_state is None
+    with pytest.raises(ValueError):
+        IngestionDaemon(tmp_path, connect=connect, approx_state=ingest.APPROX_STATE_FILE)
+
+
+def test_batches_are_folded_into_an_existing_state(tmp_path):
+    from approx import ApproxStore, load_store
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    ApproxStore().save(tmp_path / "approx_state.pkl")
+    write_csv(incoming / "a.csv", [("a1@x.com", "2021-03-01", "Brazil", 2, "Java", 8, 9),
+                                   ("a2@x.com", "2022-03-01", "Chile", 6, "Go", 3, 4)])
+    make_daemon(tmp_path, tmp_path / "warehouse.db").flush()
+
+    store = load_store(tmp_path / "approx_state.pkl")
+    assert store.reservoir.seen == 2
+    assert store.kpi(["year"])["total_applications"].tolist() == [1, 1]
@@ -0,0 +1,162 @@
+import mysql.connector
+import pandas as pd
+import pytest
+import main
+
+
+class FakeConnection:
+    def __init__(self, fail_rollback=False):
+        self.fail_rollback = fail_rollback
+        self.closed = False
+
+    def rollback(self):
+        if self.fail_rollback:
+            raise mysql.connector.errors.OperationalError(msg="Lost connection", errno=2013)
+
+    def close(self):
+        self.closed = True
+
+
+def lost_connection():
+    return mysql.connector.errors.OperationalError(msg="Lost connection", errno=2013)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(main, "RETRY_BASE_DELAY", 0)
+
+
+def test_failed_reconnects_use_the_remaining_retries():
+    opened = []
+
+    def connect():
+        if len(opened) < 2:
+            opened.append(None)
+            raise mysql.connector.errors.InterfaceError(msg="Can't connect", errno=2003)
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    calls = []
+
+    def action(connection):
+        calls.append(connection)
+        if len(calls) == 1:
+            raise lost_connection()
+
+    first = FakeConnection()
+    connection = main.run_with_retry(action, first, "chunk 0", connect)
+    assert connection is opened[-1]
+    assert len(opened) == 3
+    assert first.closed
+
+
+def test_connection_is_closed_when_rollback_fails():
+    broken = FakeConnection(fail_rollback=True)
+    replacement = FakeConnection()
+    attempts = []
+
+    def action(connection):
+        attempts.append(connection)
+        if connection is broken:
+            raise lost_connection()
+
+    assert main.run_with_retry(action, broken, "chunk 0", lambda: replacement) is replacement
+    assert broken.closed
+    assert attempts == [broken, replacement]
+
+
+def test_connection_is_closed_before_a_permanent_error_is_raised():
+    connection = FakeConnection()
+
+    def action(_):
+        raise mysql.connector.errors.ProgrammingError(msg="Unknown column", errno=1054)
+
+    with pytest.raises(mysql.connector.errors.ProgrammingError):
+        main.run_with_retry(action, connection, "chunk 0", FakeConnection)
+    assert connection.closed
+
+
+def test_retries_stop_after_max_retries():
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    def action(_):
+        raise lost_connection()
+
+    with pytest.raises(mysql.connector.errors.OperationalError):
+        main.run_with_retry(action, None, "chunk 0", connect)
+    assert len(opened) == main.MAX_RETRIES
+    assert all(c.closed for c in opened)
+
+
+def test_pool_exhaustion_is_retried():
+    assert main.is_transient_error(mysql.connector.errors.PoolError("Failed getting connection; pool exhausted"))
+    assert not main.is_transient_error(mysql.connector.errors.ProgrammingError(errno=1054))
+
+
+def test_fact_partitions_do_not_depend_on_the_worker_count():
+    fact = main.prepare_for_load("Fact_Application", pd.DataFrame({"hired_flag": [0] * 25}))
+    partitions = main.id_partitions("Fact_Application", fact, size=10)
+    assert [name for name, _ in partitions] == [
+        "Fact_Application[1-10]", "Fact_Application[11-20]", "Fact_Application[21-30]"]
+    assert [part["id"].tolist()[0] for _, part in partitions] == [1, 11, 21]
+    assert sum(len(part) for _, part in partitions) == 25
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_resume_uses_the_same_checkpoints_for_any_worker_count(monkeypatch, workers):
+    monkeypatch.setattr(main.id_partitions, "__defaults__", (10,))
+    monkeypatch.setattr(main, "get_connection", FakeConnection)
+    monkeypatch.setattr(main, "get_connection_pool", lambda size: type("Pool", (), {"get_connection": FakeConnection})())
+    monkeypatch.setattr(main, "read_checkpoints", lambda _: {
+        "Dim_Country": (2, 2),
+        "Dim_Candidate[1-10]": (10, 10),
+        "Dim_Candidate[11-20]": (10, 10),
+        "Fact_Application[1-10]": (10, 10),
+        "Fact_Application[11-20]": (4, 10),
+    })
+    loaded = []
+
+    def fake_load_table(connection, table, df, start=0, chunk_size=main.CHUNK_SIZE,
+                        checkpoint_name=None, connect=main.get_connection):
+        loaded.append((checkpoint_name, start, len(df)))
+        return connection or connect()
+
+    monkeypatch.setattr(main, "load_table", fake_load_table)
+    dataframes = {"Dim_Country": pd.DataFrame({"country_key": [1, 2]}),
+                  "Dim_Candidate": pd.DataFrame({"candidate_key": range(1, 26)}),
+                  "Fact_Application": pd.DataFrame({"hired_flag": [0] * 25})}
+
+    stats = main.load_data_to_database(dataframes, resume=True, workers=workers)
+    assert sorted(loaded) == [("Dim_Candidate[21-30]", 0, 5),
+                              ("Fact_Application[11-20]", 4, 10), ("Fact_Application[21-30]", 0, 5)]
+    assert stats["records"] == 16
+
+
+def test_candidates_are_partitioned_and_loaded_before_the_facts():
+    dataframes = {table: pd.DataFrame() for table in main.TABLE_ORDER}
+    dataframes["Dim_Country"] = pd.DataFrame({"country_key": [1, 2]})
+    dataframes["Dim_Candidate"] = pd.DataFrame({"candidate_key": range(1, 25001)})
+    dataframes["Fact_Application"] = pd.DataFrame({"hired_flag": [0] * 25000})
+
+    dimensions, facts = main.load_units(dataframes)
+    assert [name for _, name, _ in dimensions] == [
+        "Dim_Candidate[1-10000]", "Dim_Candidate[10001-20000]", "Dim_Candidate[20001-30000]", "Dim_Country"]
+    assert dimensions[2][2]["candidate_key"].tolist()[0] == 20001
+    assert [name for _, name, _ in facts] == [
+        "Fact_Application[1-10000]", "Fact_Application[10001-20000]", "Fact_Application[20001-30000]"]
+
+
+@pytest.mark.parametrize("workers", ["0", "33"])
+def test_workers_outside_the_pool_limit_are_rejected(workers):
+    with pytest.raises(SystemExit):
+        main.parse_args(["--workers", workers])
+    assert main.parse_args(["--workers", "32"]).workers == 32
+
+
+def test_approximate_state_is_opt_in():
+    assert main.parse_args([]).approx is False
+    assert main.parse_args(["--approx"]).approx is True
@@ -0,0 +1,128 @@
+from decimal import Decimal
+import mysql.connector
+import pandas as pd
+import pytest
+import query
+
+DIMENSION_TABLES = {
+    "Dim_Country": pd.DataFrame({"country_key": [1, 2, 3], "country_name": ["Brazil", "Chile", "USA"]}),
+    "Dim_Technology": pd.DataFrame({"technology_key": [1, 2], "technology_name": ["Go", "Java"]}),
+    # One row per date, so a year maps to many date keys
+    "Dim_Date": pd.DataFrame({"date_key": [1, 2, 3, 4, 5], "year": [2020, 2021, 2020, 2022, 2020]}),
+}
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.column_names = connection.columns
+
+    def execute(self, sql, params=()):
+        if self.connection.error:
+            raise self.connection.error
+        self.connection.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.connection.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows=(), columns=(), error=None):
+        self.rows, self.columns, self.error = list(rows), list(columns), error
+        self.executed = []
+        self.prepared = None
+        self.closed = False
+
+    def cursor(self, prepared=False):
+        self.prepared = prepared
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def warehouse(monkeypatch):
+    """Serve dimension tables from memory and hand out a fake connection for the KPI query"""
+    state = {"connection": FakeConnection(), "dimension_loads": []}
+
+    def execute_query(sql, description):
+        table = sql.split(" FROM ")[1].strip()
+        state["dimension_loads"].append(table)
+        df = DIMENSION_TABLES.get(table)
+        return None if df is None else df[sql.split("SELECT ")[1].split(" FROM")[0].split(", ")]
+
+    monkeypatch.setattr(query, "execute_query", execute_query)
+    monkeypatch.setattr(query, "get_connection", lambda: state["connection"])
+    query.clear_dimension_cache()
+    yield state
+    query.clear_dimension_cache()
+
+
+def test_query_groups_by_labels_and_filters_on_resolved_keys(warehouse):
+    warehouse["connection"] = FakeConnection(rows=[("Brazil", 2020, 4, 1)],
+                                             columns=["country_name", "year", "total_applications", "total_hires"])
+    df = query.build_kpi(["country", "year"], ["total_applications", "total_hires"],
+                         filters={"technology": ["Java"], "year": [2020]})
+
+    (sql, params), = warehouse["connection"].executed
+    assert warehouse["connection"].prepared is True
+    assert sql == (
+        "SELECT dc.country_name, dd.year, COUNT(fa.id) AS total_applications, SUM(fa.hired_flag) AS total_hires "
+        "FROM Fact_Application fa "
+        "JOIN Dim_Country dc ON fa.country_key = dc.country_key "
+        "JOIN Dim_Date dd ON fa.date_key = dd.date_key "
+        "WHERE fa.technology_key IN (%s) AND fa.date_key IN (%s, %s, %s) "
+        "GROUP BY dc.country_name, dd.year ORDER BY dc.country_name, dd.year"
+    )
+    # The year resolves to every date key of that year
+    assert params == (2, 1, 3, 5)
+    assert df.to_dict("records") == [{"country_name": "Brazil", "year": 2020,
+                                      "total_applications": 4, "total_hires": 1}]
+    assert warehouse["connection"].closed
+
+
+def test_dimensions_are_loaded_once_per_process(warehouse):
+    warehouse["connection"] = FakeConnection(columns=["total_applications"])
+    query.build_kpi([], ["total_applications"], filters={"country": ["Chile"]})
+    query.build_kpi([], ["total_applications"], filters={"country": ["USA"]})
+    assert warehouse["dimension_loads"] == ["Dim_Country"]
+    assert [params for _, params in warehouse["connection"].executed] == [(2,), (3,)]
+
+
+def test_filter_without_matches_returns_an_empty_frame_without_querying(warehouse):
+    df = query.build_kpi(["technology"], ["total_hires"], filters={"country": ["Atlantis"]})
+    assert df.empty
+    assert list(df.columns) == ["technology_name", "total_hires"]
+    assert warehouse["connection"].executed == []
+
+
+def test_decimal_aggregates_come_back_as_floats(warehouse):
+    warehouse["connection"] = FakeConnection(
+        rows=[("Go", Decimal("4"), Decimal("12.50")), ("Java", Decimal("7"), Decimal("33.33"))],
+        columns=["technology_name", "total_hires", "hire_rate_percentage"])
+    df = query.build_kpi(["technology"], ["total_hires", "hire_rate_percentage"])
+    assert df["total_hires"].dtype == "float64"
+    assert df["hire_rate_percentage"].tolist() == [12.5, 33.33]
+
+
+def test_errors_return_none(warehouse, monkeypatch):
+    # Dimension table that cannot be loaded
+    monkeypatch.setitem(DIMENSION_TABLES, "Dim_Country", None)
+    assert query.build_kpi(["year"], filters={"country": ["Brazil"]}) is None
+
+    # Failing KPI query
+    warehouse["connection"] = FakeConnection(error=mysql.connector.errors.ProgrammingError(msg="Unknown column"))
+    assert query.build_kpi(["technology"]) is None
+
+
+def test_unknown_names_are_rejected(warehouse):
+    with pytest.raises(ValueError):
+        query.build_kpi(["planet"])
+    with pytest.raises(ValueError):
+        query.build_kpi(["technology"], ["median_salary"])
+    with pytest.raises(ValueError):
+        query.build_kpi([], filters={"planet": ["Mars"]})
@@ -0,0 +1,93 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer
+import pandas as pd
+import pytest
+import server
+from server import DashboardCache, MANIFEST_FILE, make_handler
+
+
+def write_load(output_dir, load_id, loaded_at):
+    load_dir = output_dir / load_id
+    (load_dir / "kpi").mkdir(parents=True)
+    (load_dir / "index.html").write_bytes(b"<html></html>")
+    (load_dir / "kpi" / "summary.json").write_text('[{"total_applications": 3}]', encoding="utf-8")
+    manifest = {"load_id": load_id, "loaded_at": loaded_at, "kpis": ["summary"]}
+    (output_dir / MANIFEST_FILE).write_text(json.dumps(manifest), encoding="utf-8")
+
+
+@pytest.fixture
+def serve(tmp_path):
+    servers = []
+
+    def start(load_id, loaded_at):
+        write_load(tmp_path, load_id, loaded_at)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(DashboardCache(tmp_path)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def status(url, headers):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_etag_revalidates_with_304(serve):
+    base = serve("load-a", 1_700_000_000)
+    with urllib.request.urlopen(base + "/kpi/summary.json") as response:
+        etag = response.headers["ETag"]
+    assert status(base + "/kpi/summary.json", {"If-None-Match": etag}) == 304
+    assert status(base + "/kpi/summary.json", {"If-None-Match": '"load-b:/kpi/summary.json"'}) == 200
+
+
+def test_echoed_last_modified_revalidates_with_304(serve):
+    base = serve("load-a", 1_700_000_000)
+    with urllib.request.urlopen(base + "/kpi/summary.json") as response:
+        last_modified = response.headers["Last-Modified"]
+    assert last_modified == formatdate(1_700_000_000, usegmt=True)
+    assert status(base + "/kpi/summary.json", {"If-Modified-Since": last_modified}) == 304
+    assert status(base + "/kpi/summary.json", {"If-Modified-Since": formatdate(1_699_999_999, usegmt=True)}) == 200
+
+
+def test_loads_in_the_same_second_get_distinct_last_modified(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "get_all_kpis", lambda approximate=False: {})
+    monkeypatch.setattr(server, "get_summary_stats", lambda approximate=False: pd.DataFrame([{"total_applications": 3}]))
+    monkeypatch.setattr(server.time, "time", lambda: 1_700_000_000.9)
+
+    server.precompute_dashboard(tmp_path)
+    first = json.loads((tmp_path / MANIFEST_FILE).read_text(encoding="utf-8"))["loaded_at"]
+    server.precompute_dashboard(tmp_path)
+    second = json.loads((tmp_path / MANIFEST_FILE).read_text(encoding="utf-8"))["loaded_at"]
+    assert (first, second) == (1_700_000_000, 1_700_000_001)
+
+
+def test_precompute_resolves_labels_added_since_the_last_load(tmp_path, monkeypatch):
+    import query
+    loads = [pd.DataFrame({"country_key": [1], "country_name": ["Brazil"]}),
+             pd.DataFrame({"country_key": [1, 2], "country_name": ["Brazil", "Chile"]})]
+    monkeypatch.setattr(query, "execute_query", lambda sql, description=None: loads.pop(0))
+    query.clear_dimension_cache()
+
+    def kpis(approximate=False):
+        keys = query.resolve_filter_keys("country", ["Chile"])
+        return {"chile": pd.DataFrame({"keys": [keys]})}
+
+    monkeypatch.setattr(server, "get_all_kpis", kpis)
+    monkeypatch.setattr(server, "get_summary_stats", lambda approximate=False: pd.DataFrame())
+
+    server.precompute_dashboard(tmp_path)
+    load_id = server.precompute_dashboard(tmp_path)
+    assert json.loads((tmp_path / load_id / "kpi" / "chile.json").read_text(encoding="utf-8")) == [{"keys": [2]}]
+    query.clear_dimension_cache()